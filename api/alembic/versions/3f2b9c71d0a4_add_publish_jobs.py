@@ -0,0 +1,48 @@
+"""add publish jobs
+
+Revision ID: 3f2b9c71d0a4
+Revises: 6505d14a7ba4
+Create Date: 2026-10-17 09:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2b9c71d0a4'
+down_revision = '6505d14a7ba4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'publish_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('confab_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('result_url', sa.String(length=500), nullable=True),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['confab_id'], ['confabs.id'], name='fk_publish_jobs_confab_id_confabs', ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='fk_publish_jobs_user_id_users'),
+    )
+    op.create_index('ix_publish_jobs_id', 'publish_jobs', ['id'])
+    op.create_index('ix_publish_jobs_confab_id', 'publish_jobs', ['confab_id'])
+    op.create_index('ix_publish_jobs_status_run_after', 'publish_jobs', ['status', 'run_after'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_publish_jobs_status_run_after', table_name='publish_jobs')
+    op.drop_index('ix_publish_jobs_confab_id', table_name='publish_jobs')
+    op.drop_index('ix_publish_jobs_id', table_name='publish_jobs')
+    op.drop_table('publish_jobs')
@@ -0,0 +1,36 @@
+"""add confab access indexes
+
+Revision ID: 8c41e5a2b7f3
+Revises: 3f2b9c71d0a4
+Create Date: 2026-10-17 11:05:18.240517
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e5a2b7f3'
+down_revision = '3f2b9c71d0a4'
+branch_labels = None
+depends_on = None
+
+# users.email and github_accounts.user_id are already covered by
+# ix_users_email and uq_github_accounts_user_id; confab lookups by
+# (id, user_id) use the primary key.
+INDEXES = [
+    ('ix_confabs_user_id_created_at_id', 'confabs', ['user_id', 'created_at', 'id']),
+    ('ix_confabs_user_id_status_created_at_id', 'confabs', ['user_id', 'status', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    # Build without locking writes on Postgres (CONCURRENTLY cannot run in a transaction)
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,52 @@
+"""confab config jsonb
+
+Revision ID: b5d0f7c3e812
+Revises: 8c41e5a2b7f3
+Create Date: 2026-10-17 13:22:07.914385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d0f7c3e812'
+down_revision = '8c41e5a2b7f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # JSONB and GIN are Postgres features; other databases keep plain JSON
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column(
+        'confabs', 'config',
+        type_=postgresql.JSONB(),
+        existing_type=sa.JSON(),
+        existing_nullable=True,
+        postgresql_using='config::jsonb'
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_confabs_config', 'confabs', ['config'],
+            postgresql_using='gin',
+            postgresql_ops={'config': 'jsonb_path_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_confabs_config', table_name='confabs', postgresql_concurrently=True, if_exists=True)
+    op.alter_column(
+        'confabs', 'config',
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=True,
+        postgresql_using='config::json'
+    )
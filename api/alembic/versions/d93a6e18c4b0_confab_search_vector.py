@@ -0,0 +1,49 @@
+"""confab search vector
+
+Revision ID: d93a6e18c4b0
+Revises: b5d0f7c3e812
+Create Date: 2026-10-17 15:48:33.620194
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd93a6e18c4b0'
+down_revision = 'b5d0f7c3e812'
+branch_labels = None
+depends_on = None
+
+# Same expression as models.CONFAB_SEARCH_DOCUMENT at this revision
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce("
+    "config -> 'conversation' ->> 'system_prompt', config ->> 'system_prompt', '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    # Full-text search is Postgres-only; other databases fall back to LIKE
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Stored generated column: Postgres recomputes it on every insert/update
+    op.execute(
+        "ALTER TABLE confabs ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_DOCUMENT}) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_confabs_search_vector', 'confabs', ['search_vector'],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_confabs_search_vector', table_name='confabs', postgresql_concurrently=True, if_exists=True)
+    op.execute("ALTER TABLE confabs DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,24 @@
+"""confab published files
+
+Revision ID: e4a7c2f91b56
+Revises: d93a6e18c4b0
+Create Date: 2026-10-17 17:05:12.418730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c2f91b56'
+down_revision = 'd93a6e18c4b0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('confabs', sa.Column('published_files', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('confabs', 'published_files')
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -6,6 +8,8 @@ from fastapi import HTTPException, status
 from dotenv import load_dotenv
 import os
 
+from tracing import tracer
+
 load_dotenv()
 
 # Security configuration
@@ -19,6 +23,11 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # bcrypt has a hard 72-byte limit (after UTF-8 encoding)
 _BCRYPT_MAX_PASSWORD_BYTES = 72
 
+# Password hashing pool: bcrypt is CPU-bound, so it runs off the event loop
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # thread, process
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
 
 def _password_too_long(password: str) -> bool:
     return len(password.encode("utf-8")) > _BCRYPT_MAX_PASSWORD_BYTES
@@ -38,6 +47,86 @@ def get_password_hash(password: str) -> str:
         )
     return pwd_context.hash(password)
 
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHashPool:
+    """Bounded pool that runs bcrypt hashing and verification off the event loop.
+
+    At most ``workers`` operations run at once; beyond ``max_pending`` queued
+    operations new requests are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int, kind: str = "thread"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests, please retry"
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "pending": self.pending,
+            "queue_depth": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_EXECUTOR)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop."""
+    if _password_too_long(plain_password):
+        return False
+    with tracer.span("bcrypt verify", attributes={"bcrypt.pending": password_hash_pool.pending}):
+        return await password_hash_pool.run(_verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash without blocking the event loop."""
+    if _password_too_long(password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Password is too long (max {_BCRYPT_MAX_PASSWORD_BYTES} bytes)"
+        )
+    with tracer.span("bcrypt hash", attributes={"bcrypt.pending": password_hash_pool.pending}):
+        return await password_hash_pool.run(_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token."""
     to_encode = data.copy()
@@ -0,0 +1 @@
+"""Load benchmarks for the API, run against a local GitHub stand-in."""
@@ -0,0 +1,481 @@
+"""Local stand-in for the parts of the GitHub API the app uses.
+
+Implements the OAuth token exchange, the user/org/repo endpoints used by
+github_oauth.py and the Git Data, contents and pull request endpoints used by
+confab_manager.py, backed by in-memory repositories that are created on first
+use. Every response carries GitHub-style rate limit headers and an ETag, and
+latency, errors and rate limits can be injected:
+
+    python -m benchmarks.fake_github --port 9010 --latency-ms 80 --error-rate 0.01
+
+Point the API at it with GITHUB_API_URL and GITHUB_URL. Call counts and
+latency per endpoint template are served at /_fake/stats.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+
+@dataclass
+class FakeGitHubConfig:
+    latency_ms: float = 0.0  # Added to every response
+    jitter_ms: float = 0.0  # Uniform extra latency on top
+    error_rate: float = 0.0  # Share of requests answered with a 502
+    rate_limit: int = 5000  # Requests per token per window
+    rate_limit_window: float = 3600.0
+    repos_per_user: int = 1
+    seed: Optional[int] = None
+
+
+def git_sha(kind: str, data: bytes) -> str:
+    return hashlib.sha1(b"%s %d\0" % (kind.encode(), len(data)) + data).hexdigest()
+
+
+class FakeRepo:
+    """Blobs, trees, commits, branches and pull requests of one repository."""
+
+    def __init__(self, owner: str, name: str):
+        self.owner = owner
+        self.name = name
+        self.blobs: Dict[str, bytes] = {}
+        self.trees: Dict[str, Dict[str, str]] = {}
+        self.commits: Dict[str, Dict[str, Any]] = {}
+        self.refs: Dict[str, str] = {}
+        self.pulls: List[Dict[str, Any]] = []
+        root = self.add_commit(self.add_tree({}), [], "Initial commit")
+        self.refs["main"] = root
+
+    def add_tree(self, entries: Dict[str, str]) -> str:
+        sha = git_sha("tree", json.dumps(sorted(entries.items())).encode())
+        self.trees[sha] = entries
+        return sha
+
+    def add_commit(self, tree: str, parents: List[str], message: str) -> str:
+        body = json.dumps([tree, parents, message, len(self.commits)]).encode()
+        sha = git_sha("commit", body)
+        self.commits[sha] = {"tree": tree, "parents": parents, "message": message}
+        return sha
+
+    def resolve(self, ref: str) -> Optional[str]:
+        """Commit SHA for a branch name or commit SHA."""
+        if ref in self.refs:
+            return self.refs[ref]
+        return ref if ref in self.commits else None
+
+    def is_ancestor(self, ancestor: str, commit: str) -> bool:
+        pending = [commit]
+        while pending:
+            sha = pending.pop()
+            if sha == ancestor:
+                return True
+            pending.extend(self.commits.get(sha, {}).get("parents", []))
+        return False
+
+
+class RateLimitWindow:
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.reset = time.time() + window
+        self.used = 0
+
+    def take(self) -> bool:
+        now = time.time()
+        if now >= self.reset:
+            self.reset = now + self.window
+            self.used = 0
+        if self.used >= self.limit:
+            return False
+        self.used += 1
+        return True
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(self.limit - self.used, 0)),
+            "X-RateLimit-Reset": str(int(self.reset)),
+            "X-RateLimit-Used": str(self.used),
+            "X-RateLimit-Resource": "core",
+        }
+
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+        self.statuses: Dict[int, int] = defaultdict(int)
+
+    def record(self, status_code: int, seconds: float) -> None:
+        self.count += 1
+        self.seconds_total += seconds
+        self.seconds_max = max(self.seconds_max, seconds)
+        self.statuses[status_code] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.seconds_total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.seconds_max * 1000, 3),
+            "statuses": {str(code): n for code, n in sorted(self.statuses.items())},
+        }
+
+
+Handler = Callable[..., Any]
+
+
+class FakeGitHub:
+    """Routes GitHub API requests to in-memory state, injecting faults."""
+
+    def __init__(self, config: FakeGitHubConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.repos: Dict[Tuple[str, str], FakeRepo] = {}
+        self.limits: Dict[str, RateLimitWindow] = {}
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.routes: List[Tuple[str, re.Pattern, str, Handler]] = []
+        repo = r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)"
+        for method, pattern, handler in [
+            ("POST", r"/login/oauth/access_token", self.access_token),
+            ("GET", r"/user", self.user),
+            ("GET", r"/user/emails", self.user_emails),
+            ("GET", r"/user/orgs", self.user_orgs),
+            ("GET", r"/user/repos", self.user_repos),
+            ("GET", r"/orgs/(?P<org>[^/]+)/repos", self.org_repos),
+            ("GET", r"/rate_limit", self.rate_limit),
+            ("GET", repo, self.get_repo),
+            ("GET", repo + r"/git/ref/heads/(?P<branch>.+)", self.get_ref),
+            ("POST", repo + r"/git/refs", self.create_ref),
+            ("PATCH", repo + r"/git/refs/heads/(?P<branch>.+)", self.update_ref),
+            ("GET", repo + r"/git/commits/(?P<sha>[0-9a-f]+)", self.get_commit),
+            ("POST", repo + r"/git/commits", self.create_commit),
+            ("POST", repo + r"/git/blobs", self.create_blob),
+            ("POST", repo + r"/git/trees", self.create_tree),
+            ("GET", repo + r"/contents/(?P<path>.*)", self.get_contents),
+            ("POST", repo + r"/pulls", self.create_pull),
+            ("GET", repo + r"/pulls/(?P<number>\d+)", self.get_pull),
+        ]:
+            template = re.sub(r"\(\?P<(\w+)>[^)]*\)", r"{\1}", pattern)
+            self.routes.append((method, re.compile(pattern + "$"), template, handler))
+
+    # Dispatch
+
+    async def dispatch(self, request: Request) -> Response:
+        start = time.perf_counter()
+        path = request.url.path
+        if path.startswith("/_fake/"):
+            return await self.control(request, path)
+
+        for method, pattern, template, handler in self.routes:
+            match = pattern.match(path)
+            if match and method == request.method:
+                break
+        else:
+            template, handler, match = "unmatched", None, None
+
+        response = await self.respond(request, handler, match)
+        self.stats[f"{request.method} {template}"].record(response.status_code, time.perf_counter() - start)
+        return response
+
+    async def respond(self, request: Request, handler: Optional[Handler], match) -> Response:
+        config = self.config
+        if config.latency_ms or config.jitter_ms:
+            await asyncio.sleep((config.latency_ms + self.random.uniform(0, config.jitter_ms)) / 1000)
+
+        token = self.token(request)
+        limit = self.limits.get(token)
+        if limit is None:
+            limit = self.limits[token] = RateLimitWindow(config.rate_limit, config.rate_limit_window)
+        if not limit.take():
+            return JSONResponse(
+                {"message": "API rate limit exceeded", "documentation_url": "https://docs.github.com/rest"},
+                status_code=403,
+                headers=limit.headers(),
+            )
+
+        if handler is None:
+            response = JSONResponse({"message": "Not Found"}, status_code=404)
+        elif config.error_rate and self.random.random() < config.error_rate:
+            response = JSONResponse({"message": "Server Error"}, status_code=502)
+        else:
+            payload = await self.payload(request)
+            result = handler(request, payload, **match.groupdict())
+            status_code, data = result if isinstance(result, tuple) else (200, result)
+            response = self.json(request, status_code, data)
+            if response.status_code == 304:
+                # Conditional requests that hit do not count against the limit
+                limit.used -= 1
+
+        response.headers.update(limit.headers())
+        return response
+
+    @staticmethod
+    async def payload(request: Request) -> Optional[Dict[str, Any]]:
+        body = await request.body()
+        if not body:
+            return None
+        if request.headers.get("content-type", "").startswith("application/x-www-form-urlencoded"):
+            return dict(parse_qsl(body.decode()))
+        return json.loads(body)
+
+    def json(self, request: Request, status_code: int, data: Any) -> Response:
+        body = json.dumps(data).encode()
+        if request.method != "GET" or status_code != 200:
+            return Response(body, status_code=status_code, media_type="application/json")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(body, media_type="application/json", headers={"ETag": etag})
+
+    async def control(self, request: Request, path: str) -> Response:
+        if path == "/_fake/stats":
+            return JSONResponse({
+                "config": asdict(self.config),
+                "repos": len(self.repos),
+                "pulls": sum(len(repo.pulls) for repo in self.repos.values()),
+                "endpoints": {name: stats.snapshot() for name, stats in sorted(self.stats.items())},
+            })
+        if path == "/_fake/config" and request.method == "POST":
+            for key, value in (await request.json()).items():
+                current = getattr(self.config, key, None)
+                if isinstance(current, (int, float)):
+                    setattr(self.config, key, type(current)(value))
+            return JSONResponse(asdict(self.config))
+        if path == "/_fake/reset" and request.method == "POST":
+            self.stats.clear()
+            self.limits.clear()
+            return JSONResponse({})
+        return JSONResponse({"message": "Not Found"}, status_code=404)
+
+    # Identity
+
+    @staticmethod
+    def token(request: Request) -> str:
+        authorization = request.headers.get("authorization", "")
+        return authorization.split(" ", 1)[-1] if authorization else "anonymous"
+
+    def login(self, request: Request) -> str:
+        return f"user-{hashlib.sha1(self.token(request).encode()).hexdigest()[:10]}"
+
+    def user_id(self, request: Request) -> int:
+        return int(hashlib.sha1(self.token(request).encode()).hexdigest()[:7], 16)
+
+    def repo(self, owner: str, name: str) -> FakeRepo:
+        key = (owner.lower(), name.lower())
+        if key not in self.repos:
+            self.repos[key] = FakeRepo(owner, name)
+        return self.repos[key]
+
+    def repo_json(self, request: Request, owner: str, name: str) -> Dict[str, Any]:
+        return {
+            "id": int(hashlib.sha1(f"{owner}/{name}".encode()).hexdigest()[:7], 16),
+            "name": name,
+            "full_name": f"{owner}/{name}",
+            "private": False,
+            "owner": {"login": owner},
+            "default_branch": "main",
+            "html_url": f"{self.base_url(request)}/{owner}/{name}",
+            "permissions": {"admin": True, "push": True, "pull": True},
+        }
+
+    @staticmethod
+    def base_url(request: Request) -> str:
+        return str(request.base_url).rstrip("/")
+
+    # OAuth, users and repositories
+
+    def access_token(self, request, payload, **_):
+        # The token is derived from the code, so each code maps to one user
+        code = (payload or {}).get("code") or request.query_params.get("code", "code")
+        return {"access_token": f"gho_bench_{code}", "token_type": "bearer", "scope": "repo"}
+
+    def user(self, request, payload, **_):
+        return {"id": self.user_id(request), "login": self.login(request), "name": None, "email": None}
+
+    def user_emails(self, request, payload, **_):
+        return [{"email": f"{self.login(request)}@example.invalid", "primary": True, "verified": True}]
+
+    def user_orgs(self, request, payload, **_):
+        return []
+
+    def user_repos(self, request, payload, **_):
+        login = self.login(request)
+        names = ["confabs"] + [f"repo-{n}" for n in range(1, self.config.repos_per_user)]
+        per_page = int(request.query_params.get("per_page", 30))
+        page = int(request.query_params.get("page", 1))
+        return [self.repo_json(request, login, name) for name in names[(page - 1) * per_page:page * per_page]]
+
+    def org_repos(self, request, payload, org, **_):
+        return []
+
+    def rate_limit(self, request, payload, **_):
+        limit = self.limits[self.token(request)]
+        return {"resources": {"core": {"limit": limit.limit, "remaining": limit.limit - limit.used, "reset": int(limit.reset)}}}
+
+    def get_repo(self, request, payload, owner, repo, **_):
+        self.repo(owner, repo)
+        return self.repo_json(request, owner, repo)
+
+    # Git Data API
+
+    def get_ref(self, request, payload, owner, repo, branch, **_):
+        sha = self.repo(owner, repo).refs.get(branch)
+        if sha is None:
+            return 404, {"message": "Not Found"}
+        return {"ref": f"refs/heads/{branch}", "object": {"sha": sha, "type": "commit"}}
+
+    def create_ref(self, request, payload, owner, repo, **_):
+        state = self.repo(owner, repo)
+        branch = payload["ref"].removeprefix("refs/heads/")
+        if branch in state.refs:
+            return 422, {"message": "Reference already exists"}
+        if payload["sha"] not in state.commits:
+            return 422, {"message": "Object does not exist"}
+        state.refs[branch] = payload["sha"]
+        return 201, {"ref": payload["ref"], "object": {"sha": payload["sha"], "type": "commit"}}
+
+    def update_ref(self, request, payload, owner, repo, branch, **_):
+        state = self.repo(owner, repo)
+        if branch not in state.refs:
+            return 422, {"message": "Reference does not exist"}
+        if not payload.get("force") and not state.is_ancestor(state.refs[branch], payload["sha"]):
+            return 422, {"message": "Update is not a fast forward"}
+        state.refs[branch] = payload["sha"]
+        return {"ref": f"refs/heads/{branch}", "object": {"sha": payload["sha"], "type": "commit"}}
+
+    def get_commit(self, request, payload, owner, repo, sha, **_):
+        commit = self.repo(owner, repo).commits.get(sha)
+        if commit is None:
+            return 404, {"message": "Not Found"}
+        return {
+            "sha": sha,
+            "message": commit["message"],
+            "tree": {"sha": commit["tree"]},
+            "parents": [{"sha": parent} for parent in commit["parents"]],
+        }
+
+    def create_commit(self, request, payload, owner, repo, **_):
+        state = self.repo(owner, repo)
+        if payload["tree"] not in state.trees or any(p not in state.commits for p in payload.get("parents", [])):
+            return 422, {"message": "Object does not exist"}
+        sha = state.add_commit(payload["tree"], payload.get("parents", []), payload.get("message", ""))
+        return 201, {"sha": sha, "tree": {"sha": payload["tree"]}}
+
+    def create_blob(self, request, payload, owner, repo, **_):
+        content = payload["content"]
+        data = base64.b64decode(content) if payload.get("encoding") == "base64" else content.encode()
+        sha = git_sha("blob", data)
+        self.repo(owner, repo).blobs[sha] = data
+        return 201, {"sha": sha}
+
+    def create_tree(self, request, payload, owner, repo, **_):
+        state = self.repo(owner, repo)
+        entries = dict(state.trees.get(payload.get("base_tree"), {}))
+        for entry in payload["tree"]:
+            if entry.get("sha") is None and "content" not in entry:
+                entries.pop(entry["path"], None)
+                continue
+            sha = entry.get("sha")
+            if sha is None:
+                data = entry["content"].encode()
+                sha = git_sha("blob", data)
+                state.blobs[sha] = data
+            entries[entry["path"]] = sha
+        return 201, {"sha": state.add_tree(entries)}
+
+    def get_contents(self, request, payload, owner, repo, path, **_):
+        state = self.repo(owner, repo)
+        commit = state.resolve(request.query_params.get("ref", "main"))
+        if commit is None:
+            return 404, {"message": "No commit found for the ref"}
+        entries = state.trees[state.commits[commit]["tree"]]
+        path = path.strip("/")
+        if path in entries:
+            data = state.blobs.get(entries[path], b"")
+            return {"type": "file", "path": path, "name": path.rsplit("/", 1)[-1], "sha": entries[path],
+                    "encoding": "base64", "content": base64.b64encode(data).decode()}
+        listing = [
+            {"type": "file", "path": file_path, "name": file_path.rsplit("/", 1)[-1], "sha": sha}
+            for file_path, sha in sorted(entries.items())
+            if file_path.rsplit("/", 1)[0] == path
+        ]
+        if not listing:
+            return 404, {"message": "Not Found"}
+        return listing
+
+    # Pull requests
+
+    def create_pull(self, request, payload, owner, repo, **_):
+        state = self.repo(owner, repo)
+        if payload["head"] not in state.refs or payload["base"] not in state.refs:
+            return 422, {"message": "Validation Failed"}
+        number = len(state.pulls) + 1
+        pull = {
+            "number": number,
+            "state": "open",
+            "title": payload.get("title"),
+            "html_url": f"{self.base_url(request)}/{owner}/{repo}/pull/{number}",
+            "head": {"ref": payload["head"]},
+            "base": {"ref": payload["base"]},
+        }
+        state.pulls.append(pull)
+        return 201, pull
+
+    def get_pull(self, request, payload, owner, repo, number, **_):
+        state = self.repo(owner, repo)
+        number = int(number)
+        if not 0 < number <= len(state.pulls):
+            return 404, {"message": "Not Found"}
+        pull = state.pulls[number - 1]
+        return {**pull, "head": {**pull["head"], "sha": state.refs.get(pull["head"]["ref"])}}
+
+
+def create_app(config: Optional[FakeGitHubConfig] = None) -> Starlette:
+    fake = FakeGitHub(config or FakeGitHubConfig())
+    app = Starlette(routes=[Route("/{path:path}", fake.dispatch, methods=["GET", "POST", "PATCH", "PUT", "DELETE"])])
+    app.state.fake = fake
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9010)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--rate-limit-window", type=float, default=3600.0)
+    parser.add_argument("--repos-per-user", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeGitHubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+        repos_per_user=args.repos_per_user,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
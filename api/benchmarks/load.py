@@ -0,0 +1,531 @@
+"""End-to-end load benchmark for the API.
+
+Starts the fake GitHub server and the API (uvicorn main:app) as subprocesses
+against a throwaway database, registers users and connects them to GitHub
+through the OAuth flow, then drives a weighted mix of login, create, list,
+get and update requests at a fixed concurrency. Reports throughput and
+latency percentiles per endpoint and saves them as JSON:
+
+    python -m benchmarks.load --users 50 --duration 30 --output before.json
+    python -m benchmarks.load --github-latency-ms 100 --github-error-rate 0.02
+    python -m benchmarks.load --compare before.json after.json
+    python -m benchmarks.load --max-loop-block-ms 50
+
+With --max-loop-block-ms the API reports every event-loop stall longer than
+that (see loop_monitor.py) and the run exits non-zero if there was one, so
+a code path that blocks the loop fails the benchmark.
+
+SQLite in a temporary directory is used unless --database-url is given;
+point that at a scratch Postgres database, tables are created on startup.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from schemas import ConfabConfig
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "login=1,create=2,list=8,get=4,update=3"
+
+CONFAB_CONFIG = ConfabConfig.model_config["json_schema_extra"]["example"]
+
+TERMINAL_JOB_STATUSES = ("succeeded", "failed")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not samples:
+        return 0.0
+    return samples[max(0, math.ceil(pct / 100 * len(samples)) - 1)]
+
+
+class Recorder:
+    """Latency samples and status codes per endpoint template."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.samples[label].append(time.perf_counter() - start)
+            self.statuses[label][type(e).__name__] += 1
+            self.errors[label] += 1
+            return None
+        self.samples[label].append(time.perf_counter() - start)
+        self.statuses[label][str(response.status_code)] += 1
+        if response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for label in sorted(self.samples):
+            samples = sorted(self.samples[label])
+            endpoints[label] = {
+                "count": len(samples),
+                "errors": self.errors[label],
+                "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+                "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                "p95_ms": round(percentile(samples, 95) * 1000, 3),
+                "p99_ms": round(percentile(samples, 99) * 1000, 3),
+                "max_ms": round(samples[-1] * 1000, 3),
+                "statuses": dict(sorted(self.statuses[label].items())),
+            }
+        return endpoints
+
+
+class VirtualUser:
+    """One registered user with a GitHub connection and the confabs they made."""
+
+    def __init__(self, index: int, run_id: str):
+        self.index = index
+        self.email = f"bench-{run_id}-{index}@example.com"
+        self.password = f"bench-password-{index}"
+        self.headers: Dict[str, str] = {}
+        self.confabs: Dict[int, str] = {}
+        self.job_ids: List[int] = []
+        self.created = 0
+
+    async def setup(self, client: httpx.AsyncClient, recorder: Recorder) -> bool:
+        response = await recorder.call(client, "POST /auth/register", "POST", "/auth/register", json={
+            "name": f"Bench User {self.index}",
+            "email": self.email,
+            "password": self.password,
+            "country": "US",
+            "timezone": "UTC",
+        })
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        # Walk the OAuth callback to get a token the fake GitHub recognises
+        response = await recorder.call(
+            client, "GET /auth/github/callback", "GET", "/auth/github/callback",
+            params={"code": self.email}
+        )
+        if response is None or response.status_code not in (302, 307):
+            return False
+        redirect = parse_qs(urlparse(response.headers["location"]).query)
+        response = await recorder.call(client, "POST /auth/github/connect", "POST", "/auth/github/connect", headers=self.headers, json={
+            "github_id": int(redirect["github_id"][0]),
+            "github_username": redirect["github_username"][0],
+            "access_token": redirect["access_token"][0],
+            "selected_repo": "confabs",
+        })
+        if response is None or response.status_code != 200:
+            return False
+        return await self.create(client, recorder)
+
+    async def login(self, client: httpx.AsyncClient, recorder: Recorder) -> bool:
+        response = await recorder.call(client, "POST /auth/login", "POST", "/auth/login", json={
+            "email": self.email,
+            "password": self.password,
+        })
+        return response is not None and response.status_code == 200
+
+    async def create(self, client: httpx.AsyncClient, recorder: Recorder) -> bool:
+        self.created += 1
+        name = f"bench_{self.index}_{self.created}"
+        response = await recorder.call(client, "POST /confabs", "POST", "/confabs", headers=self.headers, json={
+            "name": name,
+            "description": f"Benchmark confab {self.created} of user {self.index}",
+            "config": CONFAB_CONFIG,
+        })
+        if response is None or response.status_code != 202:
+            return False
+        body = response.json()
+        self.confabs[body["id"]] = name
+        if body.get("publish_job_id"):
+            self.job_ids.append(body["publish_job_id"])
+        return True
+
+    async def list(self, client: httpx.AsyncClient, recorder: Recorder, page_size: int) -> bool:
+        response = await recorder.call(
+            client, "GET /confabs", "GET", "/confabs", headers=self.headers, params={"limit": page_size}
+        )
+        return response is not None and response.status_code == 200
+
+    async def get(self, client: httpx.AsyncClient, recorder: Recorder) -> bool:
+        confab_id = random.choice(list(self.confabs))
+        response = await recorder.call(
+            client, "GET /confabs/{id}", "GET", f"/confabs/{confab_id}", headers=self.headers
+        )
+        return response is not None and response.status_code == 200
+
+    async def update(self, client: httpx.AsyncClient, recorder: Recorder) -> bool:
+        confab_id = random.choice(list(self.confabs))
+        response = await recorder.call(
+            client, "PUT /confabs/{id}", "PUT", f"/confabs/{confab_id}", headers=self.headers, json={
+                "name": self.confabs[confab_id],
+                "description": f"Updated at {time.time():.6f}",
+            }
+        )
+        if response is None or response.status_code != 202:
+            return False
+        job_id = response.json().get("publish_job_id")
+        if job_id:
+            self.job_ids.append(job_id)
+        return True
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("login", "create", "list", "get", "update"):
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+async def run_user(
+    user: VirtualUser,
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    weights: Dict[str, float],
+    deadline: float,
+    page_size: int
+) -> None:
+    operations = list(weights)
+    operation_weights = list(weights.values())
+    while time.perf_counter() < deadline:
+        operation = random.choices(operations, weights=operation_weights)[0]
+        if operation == "list":
+            await user.list(client, recorder, page_size)
+        else:
+            await getattr(user, operation)(client, recorder)
+
+
+async def drain_jobs(client: httpx.AsyncClient, users: List[VirtualUser], timeout: float) -> Dict[str, Any]:
+    """Wait for the publish jobs the run queued and count how they ended."""
+    pending = {(job_id, user.index) for user in users for job_id in set(user.job_ids)}
+    by_index = {user.index: user for user in users}
+    statuses: Dict[str, int] = defaultdict(int)
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(16)
+
+    async def check(job_id: int, index: int) -> Optional[str]:
+        async with semaphore:
+            response = await client.get(f"/jobs/{job_id}", headers=by_index[index].headers)
+        if response.status_code == 404:
+            return "deleted"
+        status = response.json()["status"]
+        return status if status in TERMINAL_JOB_STATUSES else None
+
+    while pending and time.perf_counter() - start < timeout:
+        results = await asyncio.gather(*(check(job_id, index) for job_id, index in pending))
+        for key, status in zip(list(pending), results):
+            if status is not None:
+                statuses[status] += 1
+                pending.discard(key)
+        if pending:
+            await asyncio.sleep(0.5)
+
+    if pending:
+        statuses["unfinished"] = len(pending)
+    return {"jobs": dict(statuses), "drain_seconds": round(time.perf_counter() - start, 3)}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(url: str, process: subprocess.Popen, log_path: str, timeout: float = 60) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                break
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    with open(log_path) as log:
+        sys.stderr.write(log.read()[-4000:])
+    raise SystemExit(f"{url} did not come up")
+
+
+def parse_metric_line(line: str) -> Tuple[str, Dict[str, str], float]:
+    name_labels, _, value = line.rpartition(" ")
+    name, _, labels = name_labels.partition("{")
+    pairs = (pair.split("=", 1) for pair in labels.rstrip("}").split('",') if "=" in pair)
+    return name, {key: raw.strip('"') for key, raw in pairs}, float(value)
+
+
+async def loop_stats(client: httpx.AsyncClient, token: Optional[str]) -> Dict[str, Any]:
+    """Event-loop lag and stalls by route, from the /metrics of whichever worker answers."""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    response = await client.get("/metrics", headers=headers)
+    response.raise_for_status()
+    stats: Dict[str, Any] = {"max_lag_ms": None, "blocks": {}}
+    for line in response.text.splitlines():
+        if not line.startswith("event_loop_"):
+            continue
+        name, labels, value = parse_metric_line(line)
+        if name == "event_loop_lag_max_seconds":
+            stats["max_lag_ms"] = round(value * 1000, 3)
+        elif name == "event_loop_blocks_total":
+            stats["blocks"].setdefault(labels["route"], {"count": 0, "blocked_ms": 0.0})["count"] = int(value)
+        elif name == "event_loop_blocked_seconds_total":
+            stats["blocks"].setdefault(labels["route"], {"count": 0, "blocked_ms": 0.0})["blocked_ms"] = round(value * 1000, 3)
+    return stats
+
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=API_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=API_DIR, capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def start_process(args: List[str], env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(args, cwd=API_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_process(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+async def benchmark(args: argparse.Namespace, workdir: str) -> Dict[str, Any]:
+    weights = parse_mix(args.mix)
+    github_port = args.github_port or free_port()
+    api_port = args.api_port or free_port()
+    github_url = f"http://127.0.0.1:{github_port}"
+    api_url = f"http://127.0.0.1:{api_port}"
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    github_process = start_process([
+        sys.executable, "-m", "benchmarks.fake_github",
+        "--port", str(github_port),
+        "--latency-ms", str(args.github_latency_ms),
+        "--jitter-ms", str(args.github_jitter_ms),
+        "--error-rate", str(args.github_error_rate),
+        "--rate-limit", str(args.github_rate_limit),
+        *(["--seed", str(args.seed)] if args.seed is not None else []),
+    ], dict(os.environ), os.path.join(workdir, "fake_github.log"))
+
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "DATABASE_MODE": args.database_mode,
+        "GITHUB_API_URL": github_url,
+        "GITHUB_URL": github_url,
+        "GITHUB_CLIENT_ID": "bench",
+        "GITHUB_CLIENT_SECRET": "bench",
+        "GITHUB_CACHE_DIR": os.path.join(workdir, "github-cache"),
+    }
+    if args.max_loop_block_ms is not None:
+        env["LOOP_BLOCK_THRESHOLD"] = str(args.max_loop_block_ms / 1000)
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    api_process = start_process([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1",
+        "--port", str(api_port),
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+        "--no-access-log",
+    ], env, os.path.join(workdir, "api.log"))
+
+    try:
+        await wait_ready(f"{github_url}/_fake/stats", github_process, os.path.join(workdir, "fake_github.log"))
+        await wait_ready(f"{api_url}/", api_process, os.path.join(workdir, "api.log"))
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        timeout = httpx.Timeout(args.timeout)
+        async with httpx.AsyncClient(base_url=api_url, limits=limits, timeout=timeout) as client:
+            run_id = f"{int(time.time())}{random.randrange(1000)}"
+            users = [VirtualUser(i, run_id) for i in range(args.users)]
+
+            # Setup: register, connect GitHub and create a first confab each
+            setup_recorder = Recorder()
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def setup(user: VirtualUser) -> bool:
+                async with semaphore:
+                    return await user.setup(client, setup_recorder)
+
+            setup_start = time.perf_counter()
+            ready = [user for user, ok in zip(users, await asyncio.gather(*(setup(u) for u in users))) if ok]
+            setup_elapsed = time.perf_counter() - setup_start
+            if not ready:
+                raise SystemExit("No user completed setup; see the API log")
+
+            # Steady state: concurrency workers, each driving one user at a time
+            recorder = Recorder()
+            deadline = time.perf_counter() + args.duration
+            workers = [
+                run_user(ready[i % len(ready)], client, recorder, weights, deadline, args.page_size)
+                for i in range(args.concurrency)
+            ]
+            load_start = time.perf_counter()
+            await asyncio.gather(*workers)
+            load_elapsed = time.perf_counter() - load_start
+
+            publish = await drain_jobs(client, ready, args.drain) if args.drain > 0 else None
+            loop = await loop_stats(client, env.get("METRICS_TOKEN"))
+
+        async with httpx.AsyncClient() as control:
+            github_stats = (await control.get(f"{github_url}/_fake/stats")).json()
+    finally:
+        stop_process(api_process)
+        stop_process(github_process)
+
+    endpoints = recorder.summary(load_elapsed)
+    total = sum(stats["count"] for stats in endpoints.values())
+    return {
+        "meta": {
+            **git_revision(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database_url.split(":", 1)[0],
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "setup": {
+            "users_ready": len(ready),
+            "seconds": round(setup_elapsed, 3),
+            "endpoints": setup_recorder.summary(setup_elapsed),
+        },
+        "load": {
+            "seconds": round(load_elapsed, 3),
+            "requests": total,
+            "errors": sum(stats["errors"] for stats in endpoints.values()),
+            "rps": round(total / load_elapsed, 2) if load_elapsed else 0.0,
+            "endpoints": endpoints,
+        },
+        "publish": publish,
+        "loop": loop,
+        "github": github_stats,
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    header = f"{'endpoint':<26}{'count':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    for title, section in (("setup", result["setup"]), ("load", result["load"])):
+        print(f"\n{title} ({section['seconds']}s)")
+        print(header)
+        for label, stats in section["endpoints"].items():
+            print(
+                f"{label:<26}{stats['count']:>8}{stats['errors']:>6}{stats['rps']:>9}"
+                f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}"
+            )
+    load = result["load"]
+    print(f"\n{load['requests']} requests, {load['errors']} errors, {load['rps']} req/s")
+    if result["publish"]:
+        print(f"publish jobs: {result['publish']['jobs']} (drained in {result['publish']['drain_seconds']}s)")
+    calls = sum(stats["count"] for stats in result["github"]["endpoints"].values())
+    print(f"GitHub calls: {calls} across {result['github']['pulls']} pull requests")
+    loop = result.get("loop")
+    if loop:
+        print(f"event loop: max lag {loop['max_lag_ms']} ms")
+        for route, stats in sorted(loop["blocks"].items(), key=lambda item: -item[1]["blocked_ms"]):
+            print(f"  blocked {stats['count']}x, {stats['blocked_ms']} ms total by {route}")
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    print(f"before: {before['meta'].get('commit')}  after: {after['meta'].get('commit')}")
+    print(f"{'endpoint':<26}{'metric':>8}{'before':>12}{'after':>12}{'change':>10}")
+    for label, stats in after["load"]["endpoints"].items():
+        previous = before["load"]["endpoints"].get(label)
+        if previous is None:
+            continue
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            old, new = previous[metric], stats[metric]
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"{label:<26}{metric:>8}{old:>12}{new:>12}{change:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of steady-state load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--drain", type=float, default=0, help="seconds to wait for publish jobs afterwards")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--database-mode", choices=("async", "sync"), default="async")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra API environment")
+    parser.add_argument("--api-port", type=int, default=0)
+    parser.add_argument("--github-port", type=int, default=0)
+    parser.add_argument("--github-latency-ms", type=float, default=0.0)
+    parser.add_argument("--github-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--github-error-rate", type=float, default=0.0)
+    parser.add_argument("--github-rate-limit", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--max-loop-block-ms", type=float, default=None,
+        help="fail the run if the API's event loop stalls for longer than this"
+    )
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="confab-bench-")
+    try:
+        result = asyncio.run(benchmark(args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+        print(f"\nSaved {args.output}")
+
+    if args.max_loop_block_ms is not None and result["loop"]["blocks"]:
+        sys.exit(f"\nFAILED: event loop blocked for more than {args.max_loop_block_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Per-request JSON serialization cost of confab responses.
+
+Times turning query results into a response body, the way a route does
+it, for GET /confabs pages (column rows) and for one Confab carrying the
+ConfabConfig example (GET /confabs/{id}):
+
+- fastapi_json: models built field by field, then FastAPI's response_model
+  pass (validate again, dump to dicts) and json.dumps
+- fastapi_orjson: the same with ORJSONResponse as the response class
+- model_response: one validation (row dicts, or from_attributes for ORM
+  objects), then pydantic-core writes the JSON, as the routes in main.py do
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 100,500,5000 --output serialization.json
+
+Rows are read once from an in-memory SQLite database before timing starts,
+so the numbers cover serialization only and are stable across commits.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Union
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from models import Base, Confab, User
+from responses import ModelResponse
+from schemas import ConfabConfig, ConfabListItem, ConfabResponse
+
+CONFAB_CONFIG = ConfabConfig.model_config["json_schema_extra"]["example"]
+
+VARIANTS = ("fastapi_json", "fastapi_orjson", "model_response")
+
+# The columns GET /confabs selects
+LIST_COLUMNS = ("id", "name", "description", "version", "status", "github_url", "created_at", "updated_at")
+
+
+def make_confabs(count: int, config: Any = None) -> List[Confab]:
+    """Detached Confab rows shaped like a user's list page."""
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        Confab(
+            id=i + 1,
+            name=f"support-bot-{i}",
+            description="Answers billing and account questions for the support team",
+            config=config,
+            user_id=1,
+            version=f"1.0.{i % 10}",
+            status="published" if i % 3 else "draft",
+            github_url=f"https://github.com/acme/confabs/pull/{i + 1}",
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(minutes=i, seconds=30),
+        )
+        for i in range(count)
+    ]
+
+
+def make_rows(count: int) -> List[Any]:
+    """A GET /confabs page as SQLAlchemy column rows."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(id=1, name="Bench", email="bench@example.com", password_hash="-", country="US", timezone="UTC"))
+        session.add_all(make_confabs(count))
+        session.commit()
+        return session.execute(
+            select(*(getattr(Confab, column) for column in LIST_COLUMNS)).order_by(Confab.id)
+        ).all()
+
+
+def build_model(confab: Any, single: bool) -> Union[ConfabResponse, ConfabListItem]:
+    if single:
+        return ConfabResponse(
+            id=confab.id,
+            name=confab.name,
+            description=confab.description,
+            version=confab.version,
+            status=confab.status,
+            config=confab.config,
+            github_url=confab.github_url,
+            created_at=confab.created_at,
+            updated_at=confab.updated_at
+        )
+    return ConfabListItem(
+        id=confab.id,
+        name=confab.name,
+        description=confab.description,
+        version=confab.version,
+        status=confab.status,
+        github_url=confab.github_url,
+        created_at=confab.created_at,
+        updated_at=confab.updated_at
+    )
+
+
+def variants(confabs: List[Any], single: bool) -> Dict[str, Callable[[], bytes]]:
+    response_type = ConfabResponse if single else list[ConfabListItem]
+    field = create_model_field("Response", response_type, mode="serialization")
+    adapter = TypeAdapter(response_type)
+    loop = asyncio.new_event_loop()
+
+    def fastapi_path(response_class) -> Callable[[], bytes]:
+        def run() -> bytes:
+            models = build_model(confabs[0], True) if single else [build_model(c, False) for c in confabs]
+            content = loop.run_until_complete(serialize_response(field=field, response_content=models))
+            return response_class(content).body
+        return run
+
+    def model_response() -> bytes:
+        if single:
+            return ModelResponse(ConfabResponse.model_validate(confabs[0])).body
+        return adapter.dump_json(adapter.validate_python([row._asdict() for row in confabs]))
+
+    return {
+        "fastapi_json": fastapi_path(JSONResponse),
+        "fastapi_orjson": fastapi_path(ORJSONResponse),
+        "model_response": model_response,
+    }
+
+
+def time_call(func: Callable[[], bytes], min_seconds: float, repeat: int) -> Dict[str, float]:
+    """Median and best microseconds per call over `repeat` timed batches."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_seconds / 10:
+            break
+        number *= 2
+    per_call = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - start) / number * 1e6)
+    return {"median_us": round(statistics.median(per_call), 2), "best_us": round(min(per_call), 2)}
+
+
+def run_case(name: str, confabs: List[Any], single: bool, args: argparse.Namespace) -> Dict[str, Any]:
+    funcs = variants(confabs, single)
+    bodies = {variant: func() for variant, func in funcs.items()}
+    # Every path must produce the same document
+    reference = json.loads(bodies["fastapi_json"])
+    for variant, body in bodies.items():
+        if json.loads(body) != reference:
+            raise SystemExit(f"{name}: {variant} renders a different document")
+    results = {}
+    for variant in VARIANTS:
+        results[variant] = {**time_call(funcs[variant], args.min_seconds, args.repeat), "bytes": len(bodies[variant])}
+    return {"confabs": len(confabs), "variants": results}
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"{'case':<18}{'variant':<18}{'median us':>12}{'best us':>12}{'bytes':>10}{'speedup':>9}")
+    for case, stats in result["cases"].items():
+        baseline = stats["variants"]["fastapi_json"]["median_us"]
+        for variant, timing in stats["variants"].items():
+            speedup = f"{baseline / timing['median_us']:.2f}x" if timing["median_us"] else "n/a"
+            print(
+                f"{case:<18}{variant:<18}{timing['median_us']:>12}{timing['best_us']:>12}"
+                f"{timing['bytes']:>10}{speedup:>9}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,500,5000", help="confab list page sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="timed batches per case")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="approximate time per case")
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    cases = {}
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        cases[f"list-{size}"] = run_case(f"list-{size}", make_rows(size), False, args)
+    cases["config-example"] = run_case("config-example", make_confabs(1, CONFAB_CONFIG), True, args)
+
+    result = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "cases": cases,
+    }
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+        print(f"\nSaved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
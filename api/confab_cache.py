@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# Confab read cache configuration (0 disables it). Invalidation is per
+# process, so with several workers a change made through one worker shows up
+# in the others' cached reads after at most CONFAB_CACHE_TTL seconds.
+CONFAB_CACHE_TTL = float(os.getenv("CONFAB_CACHE_TTL", "0"))
+CONFAB_CACHE_MAX_ENTRIES = int(os.getenv("CONFAB_CACHE_MAX_ENTRIES", "1000"))
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+
+
+class ConfabReadCache:
+    """Size-bounded cache of serialized GET /confabs responses per user.
+
+    Entries are keyed by user id and request path + query string and hold the
+    response body with its ETag, so a hit costs neither a query nor any
+    serialization. Every write to a user's confabs must call ``invalidate``.
+    Readers take ``generation`` before querying and pass it to ``set``, so a
+    response read before a concurrent invalidation is never stored.
+    """
+
+    def __init__(self, ttl: float = CONFAB_CACHE_TTL, max_entries: int = CONFAB_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[float, CachedResponse]]" = OrderedDict()
+        self._keys: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, user_id: int, key: str) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[(user_id, key)]
+                    self._discard_key(user_id, key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end((user_id, key))
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id: int, key: str, response: CachedResponse, generation: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[(user_id, key)] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end((user_id, key))
+            self._keys.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                (old_user_id, old_key), _ = self._entries.popitem(last=False)
+                self._discard_key(old_user_id, old_key)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self.generation += 1
+            for key in self._keys.pop(user_id, ()):
+                self._entries.pop((user_id, key), None)
+
+    def _discard_key(self, user_id: int, key: str) -> None:
+        keys = self._keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys[user_id]
+
+
+# Global instance
+confab_cache = ConfabReadCache()
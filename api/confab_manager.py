@@ -1,8 +1,12 @@
-import httpx
-from typing import Dict, Any, Optional
+import asyncio
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from base64 import b64encode
 import json
 from datetime import datetime
+import secrets
+
+from github_client import github_client, GITHUB_API_URL
+from confab_templates import git_blob_sha, render_confab_files
 
 class ConfabManager:
     """Manages confab creation and updates in GitHub repositories."""
@@ -26,14 +30,20 @@ class ConfabManager:
         repo_owner: str,
         repo_name: str,
         access_token: Optional[str] = None
-    ) -> str:
-        """Create a new confab in GitHub repository."""
+    ) -> Dict[str, Any]:
+        """Create a new confab in GitHub repository.
+        
+        Returns the PR URL (or, if the default branch already has these exact
+        files, the confab's directory there) and the blob SHA of every file,
+        for later incremental updates.
+        """
         
         # Prepare confab files
-        files = self._prepare_confab_files(confab_name, confab_data)
+        files = self.render_confab_files(confab_name, confab_data)
+        file_shas = self._file_shas(files)
         
         # Create branch for the confab
-        branch_name = f"confab-{confab_name.lower().replace(' ', '-')}-{int(datetime.now().timestamp())}"
+        branch_name = self._branch_name(f"confab-{self._slugify(confab_name)}")
         
         headers = {
             "Accept": "application/vnd.github.v3+json",
@@ -42,347 +52,444 @@ class ConfabManager:
         if access_token:
             headers["Authorization"] = f"token {access_token}"
         
-        async with httpx.AsyncClient() as client:
-            # Get default branch
-            repo_response = await client.get(
-                f"https://api.github.com/repos/{repo_owner}/{repo_name}",
-                headers=headers
-            )
-            
-            if repo_response.status_code != 200:
-                raise Exception(f"Repository {repo_owner}/{repo_name} not found")
-            
-            repo_data = repo_response.json()
-            default_branch = repo_data["default_branch"]
-            
-            # Get base branch reference
-            ref_response = await client.get(
-                f"https://api.github.com/repos/{repo_owner}/{repo_name}/git/ref/heads/{default_branch}",
-                headers=headers
-            )
-            
-            if ref_response.status_code != 200:
-                raise Exception("Failed to get base branch reference")
-            
-            base_ref = ref_response.json()
-            base_sha = base_ref["object"]["sha"]
-            
-            # Create new branch
-            branch_data = {
-                "ref": f"refs/heads/{branch_name}",
-                "sha": base_sha
-            }
-            
-            branch_response = await client.post(
-                f"https://api.github.com/repos/{repo_owner}/{repo_name}/git/refs",
-                headers=headers,
-                json=branch_data
-            )
-            
-            if branch_response.status_code != 201:
-                raise Exception("Failed to create branch")
-            
-            # Create files in the new branch
-            confab_dir = f"confabs/{confab_name.lower().replace(' ', '-')}"
-            
-            for file_path, content in files.items():
-                full_path = f"{confab_dir}/{file_path}"
-                
-                # Get file SHA if it exists
-                existing_file_response = await client.get(
-                    f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/{full_path}",
-                    headers=headers
-                )
-                
-                file_data = {
-                    "message": f"Add {file_path} for confab {confab_name}",
-                    "content": b64encode(content.encode()).decode(),
-                    "branch": branch_name
-                }
-                
-                if existing_file_response.status_code == 200:
-                    # Update existing file
-                    existing_data = existing_file_response.json()
-                    file_data["sha"] = existing_data["sha"]
-                
-                file_response = await client.put(
-                    f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/{full_path}",
-                    headers=headers,
-                    json=file_data
-                )
-                
-                if file_response.status_code not in [200, 201]:
-                    raise Exception(f"Failed to create/update {file_path}")
-            
-            # Create pull request
-            pr_data = {
-                "title": f"Add confab: {confab_name}",
-                "body": f"Automated confab creation for {confab_name}\n\n{confab_data.get('description', '')}",
-                "head": branch_name,
-                "base": default_branch
-            }
-            
-            pr_response = await client.post(
-                f"https://api.github.com/repos/{repo_owner}/{repo_name}/pulls",
-                headers=headers,
-                json=pr_data
-            )
-            
-            if pr_response.status_code != 201:
-                raise Exception("Failed to create pull request")
-            
-            pr_data = pr_response.json()
-            return pr_data["html_url"]
-    
+        repo_url = f"{GITHUB_API_URL}/repos/{repo_owner}/{repo_name}"
+        
+        # Get default branch
+        repo_response = await github_client.get(repo_url, headers=headers)
+        
+        if repo_response.status_code != 200:
+            raise Exception(f"Repository {repo_owner}/{repo_name} not found")
+        
+        repo_data = repo_response.json()
+        default_branch = repo_data["default_branch"]
+        
+        # Write all files as a single commit on top of the default branch
+        base_sha = await self._get_branch_sha(repo_url, headers, default_branch)
+        commit_sha = await self._commit_files(
+            repo_url,
+            headers,
+            base_sha,
+            files,
+            f"Add confab {confab_name}"
+        )
+        
+        if commit_sha is None:
+            # The default branch already has these exact files
+            tree_url = f"{repo_data['html_url']}/tree/{default_branch}/{self.confab_dir(confab_name)}"
+            return {"html_url": tree_url, "files": file_shas}
+        
+        # Create the branch directly at the new commit
+        await self._create_branch(repo_url, headers, branch_name, commit_sha)
+        
+        # Create pull request
+        pr_data = {
+            "title": f"Add confab: {confab_name}",
+            "body": f"Automated confab creation for {confab_name}\n\n{confab_data.get('description', '')}",
+            "head": branch_name,
+            "base": default_branch
+        }
+        
+        pr_response = await github_client.post(f"{repo_url}/pulls", headers=headers, json=pr_data)
+        
+        if pr_response.status_code != 201:
+            raise Exception("Failed to create pull request")
+        
+        pr_data = pr_response.json()
+        return {"html_url": pr_data["html_url"], "files": file_shas}
+
+    async def create_confabs_in_github(
+        self,
+        confabs: List[Tuple[str, Dict[str, Any]]],
+        repo_owner: str,
+        repo_name: str,
+        access_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Create several confabs in a GitHub repository with one branch, commit and PR.
+        
+        Returns the PR URL and, in input order, the blob SHAs of each confab's files.
+        """
+        
+        # Prepare files for every confab
+        files = {}
+        confab_shas = []
+        directories = {}
+        for confab_name, confab_data in confabs:
+            # Same-named confabs would overwrite each other's files
+            directory = self.confab_dir(confab_name)
+            if directory in directories:
+                raise Exception(f"Confabs '{directories[directory]}' and '{confab_name}' are both published to {directory}/")
+            directories[directory] = confab_name
+            confab_files = self.render_confab_files(confab_name, confab_data)
+            confab_shas.append(self._file_shas(confab_files))
+            files.update(confab_files)
+        
+        branch_name = self._branch_name("confabs-bulk")
+        
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+        }
+        
+        if access_token:
+            headers["Authorization"] = f"token {access_token}"
+        
+        repo_url = f"{GITHUB_API_URL}/repos/{repo_owner}/{repo_name}"
+        
+        # Get default branch
+        repo_response = await github_client.get(repo_url, headers=headers)
+        
+        if repo_response.status_code != 200:
+            raise Exception(f"Repository {repo_owner}/{repo_name} not found")
+        
+        repo_data = repo_response.json()
+        default_branch = repo_data["default_branch"]
+        
+        # Write every confab as a single commit on top of the default branch
+        base_sha = await self._get_branch_sha(repo_url, headers, default_branch)
+        commit_sha = await self._commit_files(
+            repo_url,
+            headers,
+            base_sha,
+            files,
+            f"Add {len(confabs)} confabs"
+        )
+        
+        if commit_sha is None:
+            # The default branch already has every confab unchanged
+            return {"html_url": f"{repo_data['html_url']}/tree/{default_branch}/confabs", "files": confab_shas}
+        
+        await self._create_branch(repo_url, headers, branch_name, commit_sha)
+        
+        # Create one pull request for the whole batch
+        names = "\n".join(f"- {confab_name}" for confab_name, _ in confabs)
+        pr_data = {
+            "title": f"Add {len(confabs)} confabs",
+            "body": f"Automated bulk confab creation\n\n{names}",
+            "head": branch_name,
+            "base": default_branch
+        }
+        
+        pr_response = await github_client.post(f"{repo_url}/pulls", headers=headers, json=pr_data)
+        
+        if pr_response.status_code != 201:
+            raise Exception("Failed to create pull request")
+        
+        return {"html_url": pr_response.json()["html_url"], "files": confab_shas}
+
     async def update_confab_in_github(
         self,
         confab_name: str,
         confab_data: Dict[str, Any],
         github_url: str,
-        access_token: str
-    ) -> str:
-        """Update an existing confab in GitHub repository."""
+        access_token: str,
+        published_files: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Update an existing confab in GitHub repository, writing only what changed.
+        
+        published_files maps each path from the last publish to its blob SHA;
+        when nothing differs no GitHub call is made. Published paths that are
+        no longer rendered (the confab was renamed) are deleted. While the
+        confab's PR is open the changes are pushed as one commit onto its
+        branch, otherwise a new PR is opened against the original base branch
+        (or the default branch when github_url is not a PR).
+        """
+        
+        # Prepare updated confab files and diff them against the last publish
+        files = self.render_confab_files(confab_name, confab_data)
+        file_shas = self._file_shas(files)
+        stale_paths = [path for path in published_files or {} if path not in files]
+        
+        if published_files == file_shas:
+            return {"html_url": github_url, "files": file_shas}
         
         # Extract repo info from GitHub URL
-        # Example: https://github.com/owner/repo/pull/123
+        # Example: https://github.com/owner/repo/pull/123, or
+        # https://github.com/owner/repo/tree/main/confabs/my-bot when the
+        # confab was already on the default branch
         parts = github_url.split("/")
         repo_owner = parts[3]
         repo_name = parts[4]
-        pr_number = parts[6]
-        
-        # Prepare updated confab files
-        files = self._prepare_confab_files(confab_name, confab_data)
-        
-        # Create new branch for update
-        branch_name = f"update-confab-{confab_name.lower().replace(' ', '-')}-{int(datetime.now().timestamp())}"
         
         headers = {
             "Accept": "application/vnd.github.v3+json",
             "Authorization": f"token {access_token}"
         }
         
-        async with httpx.AsyncClient() as client:
-            # Get PR details to get base branch
-            pr_response = await client.get(
-                f"https://api.github.com/repos/{repo_owner}/{repo_name}/pulls/{pr_number}",
-                headers=headers
-            )
+        repo_url = f"{GITHUB_API_URL}/repos/{repo_owner}/{repo_name}"
+        
+        if parts[5] == "pull":
+            # Get PR details to find its branches
+            pr_response = await github_client.get(f"{repo_url}/pulls/{parts[6]}", headers=headers)
             
             if pr_response.status_code != 200:
                 raise Exception("Failed to get PR details")
             
             pr_data = pr_response.json()
-            base_branch = pr_data["base"]["ref"]
             
-            # Get base branch reference
-            ref_response = await client.get(
-                f"https://api.github.com/repos/{repo_owner}/{repo_name}/git/ref/heads/{base_branch}",
-                headers=headers
-            )
-            
-            if ref_response.status_code != 200:
-                raise Exception("Failed to get base branch reference")
+            if pr_data["state"] == "open":
+                # Push one commit with the changed files onto the existing PR branch
+                head_branch = pr_data["head"]["ref"]
+                head_sha = await self._get_branch_sha(repo_url, headers, head_branch)
+                commit_sha = await self._commit_files(
+                    repo_url,
+                    headers,
+                    head_sha,
+                    files,
+                    f"Update confab {confab_name}",
+                    existing_shas=published_files,
+                    delete=stale_paths
+                )
+                
+                if commit_sha is not None:
+                    await self._update_branch(repo_url, headers, head_branch, commit_sha)
+                
+                return {"html_url": github_url, "files": file_shas}
             
-            base_ref = ref_response.json()
-            base_sha = base_ref["object"]["sha"]
+            # The PR was merged or closed: open a new one against its base branch
+            base_branch = pr_data["base"]["ref"]
+        else:
+            # No PR to follow: open one against the default branch
+            repo_response = await github_client.get(repo_url, headers=headers)
             
-            # Create new branch
-            branch_data = {
-                "ref": f"refs/heads/{branch_name}",
-                "sha": base_sha
-            }
+            if repo_response.status_code != 200:
+                raise Exception(f"Repository {repo_owner}/{repo_name} not found")
             
-            branch_response = await client.post(
-                f"https://api.github.com/repos/{repo_owner}/{repo_name}/git/refs",
-                headers=headers,
-                json=branch_data
+            base_branch = repo_response.json()["default_branch"]
+        
+        branch_name = self._branch_name(f"update-confab-{self._slugify(confab_name)}")
+        
+        base_sha = await self._get_branch_sha(repo_url, headers, base_branch)
+        commit_sha = await self._commit_files(
+            repo_url,
+            headers,
+            base_sha,
+            files,
+            f"Update confab {confab_name}",
+            delete=stale_paths
+        )
+        
+        if commit_sha is None:
+            # The base branch already has these exact files
+            return {"html_url": github_url, "files": file_shas}
+        
+        # Create the branch directly at the new commit
+        await self._create_branch(repo_url, headers, branch_name, commit_sha)
+        
+        # Create pull request
+        pr_data = {
+            "title": f"Update confab: {confab_name}",
+            "body": f"Automated confab update for {confab_name}\n\n{confab_data.get('description', '')}",
+            "head": branch_name,
+            "base": base_branch
+        }
+        
+        pr_response = await github_client.post(f"{repo_url}/pulls", headers=headers, json=pr_data)
+        
+        if pr_response.status_code != 201:
+            raise Exception("Failed to create pull request")
+        
+        new_pr_data = pr_response.json()
+        return {"html_url": new_pr_data["html_url"], "files": file_shas}
+
+    async def _get_branch_sha(
+        self,
+        repo_url: str,
+        headers: Dict[str, str],
+        branch: str
+    ) -> str:
+        """Return the commit SHA a branch currently points at."""
+        ref_response = await github_client.get(f"{repo_url}/git/ref/heads/{branch}", headers=headers)
+        
+        if ref_response.status_code != 200:
+            raise Exception("Failed to get base branch reference")
+        
+        return ref_response.json()["object"]["sha"]
+    
+    async def _create_branch(
+        self,
+        repo_url: str,
+        headers: Dict[str, str],
+        branch_name: str,
+        sha: str
+    ) -> None:
+        """Create a branch ref pointing at the given commit."""
+        branch_data = {
+            "ref": f"refs/heads/{branch_name}",
+            "sha": sha
+        }
+        
+        branch_response = await github_client.post(f"{repo_url}/git/refs", headers=headers, json=branch_data)
+        
+        if branch_response.status_code != 201:
+            raise Exception("Failed to create branch")
+    
+    async def _update_branch(
+        self,
+        repo_url: str,
+        headers: Dict[str, str],
+        branch_name: str,
+        sha: str
+    ) -> None:
+        """Fast-forward a branch to the given commit."""
+        ref_response = await github_client.patch(
+            f"{repo_url}/git/refs/heads/{branch_name}",
+            headers=headers,
+            json={"sha": sha, "force": False}
+        )
+        
+        if ref_response.status_code != 200:
+            raise Exception("Failed to update branch")
+    
+    async def _commit_files(
+        self,
+        repo_url: str,
+        headers: Dict[str, str],
+        base_sha: str,
+        files: Dict[str, str],
+        message: str,
+        existing_shas: Optional[Dict[str, str]] = None,
+        delete: Iterable[str] = ()
+    ) -> Optional[str]:
+        """Write files as one commit on top of base_sha using the Git Data API.
+        
+        Blobs are uploaded concurrently, then a single tree and a single commit
+        are created, so the number of sequential round-trips does not grow with
+        the number of files. Files whose git blob SHA already matches the base
+        tree are not uploaded at all; pass existing_shas when they are already
+        known to skip looking them up. Paths in delete are removed if the base
+        tree has them. Returns the new commit SHA, or None when nothing
+        changed; no ref is moved.
+        """
+        delete = [path for path in delete if path not in files]
+        
+        # Resolve the tree of the base commit and the SHAs of the files already there
+        if existing_shas is None:
+            commit_response, existing_shas = await asyncio.gather(
+                github_client.get(f"{repo_url}/git/commits/{base_sha}", headers=headers),
+                self._get_blob_shas(repo_url, headers, base_sha, [*files, *delete])
             )
-            
-            if branch_response.status_code != 201:
-                raise Exception("Failed to create branch")
-            
-            # Update files in the new branch
-            confab_dir = f"confabs/{confab_name.lower().replace(' ', '-')}"
-            
-            for file_path, content in files.items():
-                full_path = f"{confab_dir}/{file_path}"
-                
-                # Get existing file
-                existing_file_response = await client.get(
-                    f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/{full_path}",
-                    headers=headers
-                )
-                
-                if existing_file_response.status_code == 200:
-                    existing_data = existing_file_response.json()
-                    file_sha = existing_data["sha"]
-                else:
-                    file_sha = None
-                
-                file_data = {
-                    "message": f"Update {file_path} for confab {confab_name}",
+        else:
+            commit_response = await github_client.get(f"{repo_url}/git/commits/{base_sha}", headers=headers)
+        
+        if commit_response.status_code != 200:
+            raise Exception("Failed to get base commit")
+        
+        base_tree_sha = commit_response.json()["tree"]["sha"]
+        
+        files = {
+            path: content for path, content in files.items()
+            if existing_shas.get(path) != git_blob_sha(content)
+        }
+        delete = [path for path in delete if path in existing_shas]
+        if not files and not delete:
+            return None
+        
+        # Upload blobs concurrently
+        async def create_blob(path: str, content: str) -> Dict[str, str]:
+            blob_response = await github_client.post(
+                f"{repo_url}/git/blobs",
+                headers=headers,
+                json={
                     "content": b64encode(content.encode()).decode(),
-                    "branch": branch_name
+                    "encoding": "base64"
                 }
-                
-                if file_sha:
-                    file_data["sha"] = file_sha
-                
-                file_response = await client.put(
-                    f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/{full_path}",
-                    headers=headers,
-                    json=file_data
-                )
-                
-                if file_response.status_code not in [200, 201]:
-                    raise Exception(f"Failed to update {file_path}")
+            )
             
-            # Create pull request
-            pr_data = {
-                "title": f"Update confab: {confab_name}",
-                "body": f"Automated confab update for {confab_name}\n\n{confab_data.get('description', '')}",
-                "head": branch_name,
-                "base": base_branch
-            }
+            if blob_response.status_code != 201:
+                raise Exception(f"Failed to create blob for {path}")
             
-            pr_response = await client.post(
-                f"https://api.github.com/repos/{repo_owner}/{repo_name}/pulls",
+            return {
+                "path": path,
+                "mode": "100644",
+                "type": "blob",
+                "sha": blob_response.json()["sha"]
+            }
+        
+        tree_entries = await asyncio.gather(
+            *(create_blob(path, content) for path, content in files.items())
+        )
+        # A null SHA removes the path from the tree
+        tree_entries += [{"path": path, "mode": "100644", "type": "blob", "sha": None} for path in delete]
+        
+        # Create a single tree containing every file
+        tree_response = await github_client.post(
+            f"{repo_url}/git/trees",
+            headers=headers,
+            json={"base_tree": base_tree_sha, "tree": list(tree_entries)}
+        )
+        
+        if tree_response.status_code != 201:
+            raise Exception("Failed to create tree")
+        
+        # Create a single commit for the tree
+        new_commit_response = await github_client.post(
+            f"{repo_url}/git/commits",
+            headers=headers,
+            json={
+                "message": message,
+                "tree": tree_response.json()["sha"],
+                "parents": [base_sha]
+            }
+        )
+        
+        if new_commit_response.status_code != 201:
+            raise Exception("Failed to create commit")
+        
+        return new_commit_response.json()["sha"]
+    
+    async def _get_blob_shas(
+        self,
+        repo_url: str,
+        headers: Dict[str, str],
+        ref: str,
+        files: Iterable[str]
+    ) -> Dict[str, str]:
+        """Return the blob SHA of each of the given paths that exists at ref."""
+        directories = {path.rsplit("/", 1)[0] for path in files}
+        
+        async def list_directory(directory: str) -> Dict[str, str]:
+            contents_response = await github_client.get(
+                f"{repo_url}/contents/{directory}",
                 headers=headers,
-                json=pr_data
+                params={"ref": ref}
             )
             
-            if pr_response.status_code != 201:
-                raise Exception("Failed to create pull request")
+            if contents_response.status_code != 200 or not isinstance(contents_response.json(), list):
+                # Missing directory (new confab): every file needs uploading
+                return {}
             
-            new_pr_data = pr_response.json()
-            return new_pr_data["html_url"]
+            return {entry["path"]: entry["sha"] for entry in contents_response.json() if entry.get("type") == "file"}
+        
+        shas = {}
+        for listing in await asyncio.gather(*(list_directory(directory) for directory in directories)):
+            shas.update(listing)
+        return shas
+    
+    def _file_shas(self, files: Dict[str, str]) -> Dict[str, str]:
+        return {path: git_blob_sha(content) for path, content in files.items()}
+    
+    def _slugify(self, confab_name: str) -> str:
+        return confab_name.lower().replace(' ', '-')
+    
+    def _branch_name(self, prefix: str) -> str:
+        """A new branch name; the random suffix keeps publishes in the same second apart."""
+        return f"{prefix}-{int(datetime.now().timestamp())}-{secrets.token_hex(4)}"
+    
+    def confab_dir(self, confab_name: str) -> str:
+        """Repository directory a confab is published under."""
+        return f"confabs/{self._slugify(confab_name)}"
+    
+    def _confab_paths(self, confab_name: str, files: Dict[str, str]) -> Dict[str, str]:
+        """Map confab file names to their repository paths."""
+        confab_dir = self.confab_dir(confab_name)
+        return {f"{confab_dir}/{file_path}": content for file_path, content in files.items()}
+    
+    def render_confab_files(self, confab_name: str, confab_data: Dict[str, Any]) -> Dict[str, str]:
+        """Render a confab's files keyed by their repository paths."""
+        return self._confab_paths(confab_name, self._prepare_confab_files(confab_name, confab_data))
     
     def _prepare_confab_files(self, confab_name: str, confab_data: Dict[str, Any]) -> Dict[str, str]:
         """Prepare confab files for GitHub repository."""
-        
-        # Create Confab.toml
-        confab_toml = f"""[confab]
-name = "{confab_name}"
-description = "{confab_data.get('description', '')}"
-version = "1.0.0"
-created_at = "{datetime.now().isoformat()}"
-
-[metadata]
-author = "Let's Confab"
-license = "MIT"
-"""
-        
-        # Create PURPOSE.md
-        purpose_md = f"""# Purpose: {confab_name}
-
-{confab_data.get('purpose', f'This confab is designed to {confab_data.get("description", "perform specific tasks")}')}
-
-## Primary Objectives
-- {confab_data.get('description', 'Main functionality description')}
-
-## Target Use Cases
-- User interactions and scenarios where this confab excels
-- Specific problems it solves
-
-## Expected Behavior
-- How the confab should respond in different situations
-- Key features and capabilities
-"""
-        
-        # Create GUARDRAILS.md
-        guardrails_md = f"""# Guardrails: {confab_name}
-
-## Safety Constraints
-- Do not generate harmful, illegal, or unethical content
-- Respect user privacy and data protection guidelines
-- Avoid making claims beyond the confab's capabilities
-
-## Behavioral Boundaries
-- Stay within the defined scope of {confab_name}
-- Do not impersonate individuals or organizations without permission
-- Maintain professional and respectful communication
-
-## Content Guidelines
-- Ensure all generated content is accurate and helpful
-- Provide citations or sources when making factual claims
-- Acknowledge limitations when uncertain
-
-## Error Handling
-- Gracefully handle ambiguous or unclear requests
-- Ask for clarification when needed
-- Provide helpful error messages and suggestions
-"""
-        
-        # Create TESTS.md
-        tests_md = f"""# Tests: {confab_name}
-
-## Unit Tests
-### Basic Functionality
-- [ ] Test basic conversation flow
-- [ ] Test response accuracy
-- [ ] Test error handling
-
-### Edge Cases
-- [ ] Test with ambiguous input
-- [ ] Test with incomplete information
-- [ ] Test with conflicting requests
-
-## Integration Tests
-### API Integration
-- [ ] Test external API connections
-- [ ] Test data flow between components
-- [ ] Test error recovery
-
-### User Interface
-- [ ] Test user interaction patterns
-- [ ] Test response formatting
-- [ ] Test accessibility features
-
-## Performance Tests
-### Response Time
-- [ ] Test under normal load
-- [ ] Test under peak load
-- [ ] Test with concurrent users
-
-### Resource Usage
-- [ ] Monitor memory usage
-- [ ] Monitor CPU usage
-- [ ] Test scalability limits
-
-## Security Tests
-### Input Validation
-- [ ] Test for injection attacks
-- [ ] Test for malicious input
-- [ ] Test data sanitization
-
-### Access Control
-- [ ] Test authentication mechanisms
-- [ ] Test authorization levels
-- [ ] Test data privacy
-
-## Test Scenarios
-### Happy Path
-1. User provides clear, valid input
-2. Confab processes request correctly
-3. Response is accurate and helpful
-
-### Error Recovery
-1. User provides invalid input
-2. Confab identifies the issue
-3. Confab provides helpful guidance
-
-### Complex Queries
-1. User asks multi-part questions
-2. Confab addresses all components
-3. Response is well-structured and complete
-"""
-        
-        return {
-            "Confab.toml": confab_toml,
-            "PURPOSE.md": purpose_md,
-            "GUARDRAILS.md": guardrails_md,
-            "TESTS.md": tests_md
-        }
+        return render_confab_files(confab_name, confab_data)
 
 # Global instance
 confab_manager = ConfabManager()
@@ -394,17 +501,28 @@ async def create_confab_in_github(
     repo_owner: str,
     repo_name: str,
     access_token: Optional[str] = None
-) -> str:
+) -> Dict[str, Any]:
     return await confab_manager.create_confab_in_github(
         confab_name, confab_data, repo_owner, repo_name, access_token
     )
 
+async def create_confabs_in_github(
+    confabs: List[Tuple[str, Dict[str, Any]]],
+    repo_owner: str,
+    repo_name: str,
+    access_token: Optional[str] = None
+) -> Dict[str, Any]:
+    return await confab_manager.create_confabs_in_github(
+        confabs, repo_owner, repo_name, access_token
+    )
+
 async def update_confab_in_github(
     confab_name: str,
     confab_data: Dict[str, Any],
     github_url: str,
-    access_token: str
-) -> str:
+    access_token: str,
+    published_files: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
     return await confab_manager.update_confab_in_github(
-        confab_name, confab_data, github_url, access_token
+        confab_name, confab_data, github_url, access_token, published_files
     )
@@ -0,0 +1,188 @@
+import hashlib
+import json
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ConfabTemplate:
+    """A text template parsed once into literal and ``{field}`` parts.
+
+    Rendering only joins strings, so the same inputs always produce the same
+    bytes and there is no per-call parsing.
+    """
+
+    def __init__(self, source: str):
+        self._parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(source)
+        ]
+
+    def render(self, context: Dict[str, str]) -> str:
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field is not None:
+                out.append(context[field])
+        return "".join(out)
+
+
+def toml_string(value: Any) -> str:
+    """Quote a value as a TOML basic string."""
+    # A JSON string literal is also a valid TOML basic string
+    return json.dumps("" if value is None else str(value), ensure_ascii=False)
+
+
+def git_blob_sha(content: str) -> str:
+    """The SHA git (and GitHub) assigns to a file with this content."""
+    data = content.encode()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+CONFAB_TOML = ConfabTemplate("""[confab]
+name = {name_toml}
+description = {description_toml}
+version = {version_toml}
+created_at = {created_at_toml}
+
+[metadata]
+author = "Let's Confab"
+license = "MIT"
+""")
+
+PURPOSE_MD = ConfabTemplate("""# Purpose: {name}
+
+{purpose}
+
+## Primary Objectives
+- {objective}
+
+## Target Use Cases
+- User interactions and scenarios where this confab excels
+- Specific problems it solves
+
+## Expected Behavior
+- How the confab should respond in different situations
+- Key features and capabilities
+""")
+
+GUARDRAILS_MD = ConfabTemplate("""# Guardrails: {name}
+
+## Safety Constraints
+- Do not generate harmful, illegal, or unethical content
+- Respect user privacy and data protection guidelines
+- Avoid making claims beyond the confab's capabilities
+
+## Behavioral Boundaries
+- Stay within the defined scope of {name}
+- Do not impersonate individuals or organizations without permission
+- Maintain professional and respectful communication
+
+## Content Guidelines
+- Ensure all generated content is accurate and helpful
+- Provide citations or sources when making factual claims
+- Acknowledge limitations when uncertain
+
+## Error Handling
+- Gracefully handle ambiguous or unclear requests
+- Ask for clarification when needed
+- Provide helpful error messages and suggestions
+""")
+
+TESTS_MD = ConfabTemplate("""# Tests: {name}
+
+## Unit Tests
+### Basic Functionality
+- [ ] Test basic conversation flow
+- [ ] Test response accuracy
+- [ ] Test error handling
+
+### Edge Cases
+- [ ] Test with ambiguous input
+- [ ] Test with incomplete information
+- [ ] Test with conflicting requests
+
+## Integration Tests
+### API Integration
+- [ ] Test external API connections
+- [ ] Test data flow between components
+- [ ] Test error recovery
+
+### User Interface
+- [ ] Test user interaction patterns
+- [ ] Test response formatting
+- [ ] Test accessibility features
+
+## Performance Tests
+### Response Time
+- [ ] Test under normal load
+- [ ] Test under peak load
+- [ ] Test with concurrent users
+
+### Resource Usage
+- [ ] Monitor memory usage
+- [ ] Monitor CPU usage
+- [ ] Test scalability limits
+
+## Security Tests
+### Input Validation
+- [ ] Test for injection attacks
+- [ ] Test for malicious input
+- [ ] Test data sanitization
+
+### Access Control
+- [ ] Test authentication mechanisms
+- [ ] Test authorization levels
+- [ ] Test data privacy
+
+## Test Scenarios
+### Happy Path
+1. User provides clear, valid input
+2. Confab processes request correctly
+3. Response is accurate and helpful
+
+### Error Recovery
+1. User provides invalid input
+2. Confab identifies the issue
+3. Confab provides helpful guidance
+
+### Complex Queries
+1. User asks multi-part questions
+2. Confab addresses all components
+3. Response is well-structured and complete
+""")
+
+CONFAB_FILE_TEMPLATES = {
+    "Confab.toml": CONFAB_TOML,
+    "PURPOSE.md": PURPOSE_MD,
+    "GUARDRAILS.md": GUARDRAILS_MD,
+    "TESTS.md": TESTS_MD,
+}
+
+
+def confab_template_data(confab: Any) -> Dict[str, Any]:
+    """The stored fields a confab's files are rendered from (ORM object or row)."""
+    return {
+        "name": confab.name,
+        "description": confab.description,
+        "config": confab.config,
+        "version": confab.version,
+        "created_at": confab.created_at.isoformat() if confab.created_at else None,
+    }
+
+
+def render_confab_files(confab_name: str, confab_data: Dict[str, Any]) -> Dict[str, str]:
+    """Render every confab file from stored confab data.
+
+    Only the given data is used (no clock, no randomness), so re-rendering an
+    unchanged confab yields byte-identical files with identical blob SHAs.
+    """
+    description = confab_data.get("description") or ""
+    context = {
+        "name": confab_name,
+        "name_toml": toml_string(confab_name),
+        "description_toml": toml_string(description),
+        "version_toml": toml_string(confab_data.get("version") or "1.0.0"),
+        "created_at_toml": toml_string(confab_data.get("created_at") or ""),
+        "purpose": confab_data.get("purpose") or f"This confab is designed to {description or 'perform specific tasks'}",
+        "objective": description or "Main functionality description",
+    }
+    return {file_name: template.render(context) for file_name, template in CONFAB_FILE_TEMPLATES.items()}
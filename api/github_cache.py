@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+import os
+
+import httpx
+
+load_dotenv()
+
+# Conditional-request cache configuration
+GITHUB_CACHE_BACKEND = os.getenv("GITHUB_CACHE_BACKEND", "memory")  # memory, redis, disk, none
+GITHUB_CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "5000"))
+GITHUB_CACHE_MAX_BODY_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BODY_BYTES", str(1024 * 1024)))
+GITHUB_CACHE_TTL = int(os.getenv("GITHUB_CACHE_TTL", "86400"))
+GITHUB_CACHE_REDIS_URL = os.getenv("GITHUB_CACHE_REDIS_URL", "redis://localhost:6379/0")
+GITHUB_CACHE_DIR = os.getenv("GITHUB_CACHE_DIR", ".github-cache")
+
+# Headers replayed from the cached response on a 304
+_CACHED_HEADERS = ("content-type", "etag", "last-modified", "link")
+
+
+class CacheEntry:
+    """A cached 200 response plus the validators used to revalidate it."""
+
+    def __init__(self, headers: List[Tuple[str, str]], content: bytes):
+        self.headers = headers
+        self.content = content
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "CacheEntry":
+        headers = [(name, response.headers[name]) for name in _CACHED_HEADERS if name in response.headers]
+        return cls(headers, response.content)
+
+    def validators(self) -> Dict[str, str]:
+        headers = dict(self.headers)
+        validators = {}
+        if "etag" in headers:
+            validators["If-None-Match"] = headers["etag"]
+        if "last-modified" in headers:
+            validators["If-Modified-Since"] = headers["last-modified"]
+        return validators
+
+    def to_response(self, not_modified: httpx.Response) -> httpx.Response:
+        """Rebuild the cached 200 response, keeping fresh headers (e.g. rate limits) from the 304."""
+        headers = httpx.Headers(self.headers)
+        for name, value in not_modified.headers.items():
+            if name.startswith("x-ratelimit-") or name in ("etag", "last-modified", "date"):
+                headers[name] = value
+        return httpx.Response(200, headers=headers, content=self.content, request=not_modified.request)
+
+    def dumps(self) -> str:
+        return json.dumps({"headers": self.headers, "content": b64encode(self.content).decode()})
+
+    @classmethod
+    def loads(cls, data: str) -> "CacheEntry":
+        raw = json.loads(data)
+        return cls([tuple(h) for h in raw["headers"]], b64decode(raw["content"]))
+
+
+class MemoryCacheBackend:
+    """Bounded in-process LRU."""
+
+    def __init__(self, max_entries: int = GITHUB_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisCacheBackend:
+    """Shared cache in any Redis-protocol server; entries expire after GITHUB_CACHE_TTL."""
+
+    def __init__(self, url: str = GITHUB_CACHE_REDIS_URL, ttl: int = GITHUB_CACHE_TTL):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("GITHUB_CACHE_BACKEND=redis requires the 'redis' package")
+        self._redis = redis.from_url(url)
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        data = await self._redis.get(f"github-cache:{key}")
+        return CacheEntry.loads(data) if data else None
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        await self._redis.set(f"github-cache:{key}", entry.dumps(), ex=self.ttl)
+
+
+class DiskCacheBackend:
+    """One file per entry; the oldest files are pruned beyond max_entries."""
+
+    def __init__(self, directory: str = GITHUB_CACHE_DIR, max_entries: int = GITHUB_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _read(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(key)) as f:
+                return CacheEntry.loads(f.read())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, key: str, entry: CacheEntry) -> None:
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(entry.dumps())
+        os.replace(tmp_path, self._path(key))
+
+    def _prune(self) -> None:
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=lambda p: os.stat(p).st_mtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        await asyncio.to_thread(self._write, key, entry)
+        self._writes += 1
+        if self._writes % 100 == 0:
+            await asyncio.to_thread(self._prune)
+
+
+class GitHubCache:
+    """ETag/Last-Modified cache for GitHub GET requests, keyed per token and URL.
+
+    GitHub does not count 304 responses against the rate limit, so revalidating
+    a cached response is both faster and free compared to refetching it.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str, headers: Optional[Dict[str, str]]) -> str:
+        headers = headers or {}
+        raw = "\n".join([headers.get("Authorization", ""), headers.get("Accept", ""), str(url)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return await self.backend.get(key)
+
+    async def store(self, key: str, response: httpx.Response) -> None:
+        if response.status_code != 200 or len(response.content) > GITHUB_CACHE_MAX_BODY_BYTES:
+            return
+        if "etag" not in response.headers and "last-modified" not in response.headers:
+            return
+        await self.backend.set(key, CacheEntry.from_response(response))
+
+
+def build_github_cache(backend: str = GITHUB_CACHE_BACKEND) -> Optional[GitHubCache]:
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return GitHubCache(RedisCacheBackend())
+    if backend == "disk":
+        return GitHubCache(DiskCacheBackend())
+    return GitHubCache(MemoryCacheBackend())
@@ -0,0 +1,159 @@
+import asyncio
+import time
+import httpx
+from typing import Optional
+from dotenv import load_dotenv
+import os
+
+from github_cache import GitHubCache, build_github_cache
+from github_rate_limit import RateLimitScheduler, rate_limit_scheduler
+from metrics import github_endpoint, record_github_request
+from tracing import tracer
+
+load_dotenv()
+
+# Overridable to point at GitHub Enterprise or a local stand-in (see benchmarks/)
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_URL = os.getenv("GITHUB_URL", "https://github.com")
+
+HTTPX_TIMEOUT = httpx.Timeout(connect=10.0, read=30.0, write=10.0, pool=10.0)
+
+# Connection pool configuration
+GITHUB_HTTP2 = os.getenv("GITHUB_HTTP2", "true").lower() == "true"
+GITHUB_MAX_CONNECTIONS = int(os.getenv("GITHUB_MAX_CONNECTIONS", "100"))
+GITHUB_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GITHUB_MAX_KEEPALIVE_CONNECTIONS", "20"))
+GITHUB_KEEPALIVE_EXPIRY = float(os.getenv("GITHUB_KEEPALIVE_EXPIRY", "30"))
+
+
+class GitHubClient:
+    """Shared, pooled HTTP client that all GitHub traffic goes through.
+
+    The underlying connection pool is opened on application startup and
+    closed on shutdown, so TLS sessions and keep-alive connections are reused
+    across requests instead of being set up on every call. Every request is
+    paced by the rate-limit scheduler and retried when GitHub rate-limits it,
+    and GET requests are revalidated against the conditional-request cache.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        scheduler: RateLimitScheduler = rate_limit_scheduler,
+        cache: Optional[GitHubCache] = None
+    ):
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.scheduler = scheduler
+        self.cache = cache
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=GITHUB_HTTP2,
+            timeout=HTTPX_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=GITHUB_MAX_CONNECTIONS,
+                max_keepalive_connections=GITHUB_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=GITHUB_KEEPALIVE_EXPIRY,
+            ),
+            transport=self._transport,
+            trust_env=False,
+        )
+
+    async def start(self) -> None:
+        """Open the connection pool."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Scripts and workers that run outside the app lifespan get a pool
+        # lazily; it is reused until close() is called.
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self.cache is None or method.upper() != "GET":
+            return await self._send(method, url, **kwargs)
+
+        headers = kwargs.get("headers") or {}
+        cache_key = self.cache.key(httpx.URL(url, params=kwargs.get("params")), headers)
+        entry = await self.cache.get(cache_key)
+        if entry is not None:
+            kwargs["headers"] = {**headers, **entry.validators()}
+
+        response = await self._send(method, url, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.hits += 1
+            return entry.to_response(response)
+        self.cache.misses += 1
+        await self.cache.store(cache_key, response)
+        return response
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        headers = kwargs.get("headers")
+        attempt = 0
+        while True:
+            wait_start = time.perf_counter()
+            await self.scheduler.acquire(method, url, headers)
+            throttled = time.perf_counter() - wait_start
+            response = await self._send_once(method, url, attempt, throttled, **kwargs)
+            self.scheduler.observe(headers, response)
+
+            delay = self.scheduler.retry_delay(response, attempt)
+            if delay is None:
+                return response
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _send_once(self, method: str, url: str, attempt: int, throttled: float, **kwargs) -> httpx.Response:
+        """One HTTP round-trip, recorded in metrics and as a client span."""
+        path = httpx.URL(url).path
+        endpoint = github_endpoint(path)
+        span = tracer.start_span(f"GitHub {method} {endpoint}", "client", {
+            "http.method": method,
+            "http.url": url.split("?", 1)[0],
+            "github.endpoint": endpoint,
+            "github.attempt": attempt,
+            "github.throttled_ms": round(throttled * 1000, 3),
+        }) if tracer.current_span() is not None else None
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            record_github_request(method, path, type(e).__name__, time.perf_counter() - start)
+            if span is not None:
+                span.record_error(f"{type(e).__name__}: {e}")
+                tracer.end_span(span)
+            raise
+        record_github_request(method, path, str(response.status_code), time.perf_counter() - start)
+        if span is not None:
+            span.set_attribute("http.status_code", response.status_code)
+            span.set_attribute("http.request_content_length", len(response.request.content))
+            span.set_attribute("http.response_content_length", len(response.content))
+            for header in ("x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset", "x-ratelimit-resource"):
+                span.set_attribute(f"github.{header[2:].replace('-', '_')}", response.headers.get(header))
+            if response.status_code >= 400:
+                span.record_error(f"HTTP {response.status_code}")
+            tracer.end_span(span)
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", url, **kwargs)
+
+
+# Global instance
+github_client = GitHubClient(cache=build_github_cache())
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Set
+import asyncio
 import httpx
 from dotenv import load_dotenv
 import os
 
+from github_client import github_client, GITHUB_API_URL, GITHUB_URL
+
 load_dotenv()
 
 # GitHub OAuth configuration
@@ -14,7 +17,8 @@ GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET")
 GITHUB_BACKEND_REDIRECT_URI = os.getenv("GITHUB_BACKEND_REDIRECT_URI", "http://localhost:8001/auth/github/callback")
 GITHUB_FRONTEND_REDIRECT_URI = os.getenv("GITHUB_FRONTEND_REDIRECT_URI", "http://localhost:3000/auth/github/callback")
 
-HTTPX_TIMEOUT = httpx.Timeout(connect=10.0, read=30.0, write=10.0, pool=10.0)
+# Maximum concurrent page requests when listing repositories
+GITHUB_REPOS_CONCURRENCY = int(os.getenv("GITHUB_REPOS_CONCURRENCY", "8"))
 
 github_auth_router = APIRouter()
 
@@ -36,7 +40,7 @@ class GitHubRepo(BaseModel):
     full_name: str
     private: bool
     owner: Dict[str, Any]
-    permissions: Dict[str, str]
+    permissions: Dict[str, bool]
 
 @github_auth_router.get("/authorize")
 async def github_authorize():
@@ -48,7 +52,7 @@ async def github_authorize():
         )
     
     auth_url = (
-        f"https://github.com/login/oauth/authorize?"
+        f"{GITHUB_URL}/login/oauth/authorize?"
         f"client_id={GITHUB_CLIENT_ID}&"
         f"redirect_uri={GITHUB_BACKEND_REDIRECT_URI}&"
         f"scope=public_repo user:email"
@@ -67,17 +71,16 @@ async def github_callback(code: str):
     
     # Exchange code for access token
     try:
-        async with httpx.AsyncClient(timeout=HTTPX_TIMEOUT, trust_env=False) as client:
-            token_response = await client.post(
-                "https://github.com/login/oauth/access_token",
-                headers={"Accept": "application/json"},
-                data={
-                    "client_id": GITHUB_CLIENT_ID,
-                    "client_secret": GITHUB_CLIENT_SECRET,
-                    "code": code,
-                    "redirect_uri": GITHUB_BACKEND_REDIRECT_URI
-                }
-            )
+        token_response = await github_client.post(
+            f"{GITHUB_URL}/login/oauth/access_token",
+            headers={"Accept": "application/json"},
+            data={
+                "client_id": GITHUB_CLIENT_ID,
+                "client_secret": GITHUB_CLIENT_SECRET,
+                "code": code,
+                "redirect_uri": GITHUB_BACKEND_REDIRECT_URI
+            }
+        )
     except httpx.TimeoutException:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -119,116 +122,175 @@ async def github_callback(code: str):
 
 async def get_github_user(access_token: str) -> GitHubUser:
     """Get GitHub user information using access token."""
-    async with httpx.AsyncClient(timeout=HTTPX_TIMEOUT, trust_env=False) as client:
-        response = await client.get(
-            "https://api.github.com/user",
-            headers={"Authorization": f"token {access_token}"}
+    response = await github_client.get(
+        f"{GITHUB_API_URL}/user",
+        headers={"Authorization": f"token {access_token}"}
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to fetch GitHub user information"
         )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to fetch GitHub user information"
-            )
-        
-        user_data = response.json()
-        return GitHubUser(**user_data)
+    
+    user_data = response.json()
+    return GitHubUser(**user_data)
 
 async def get_github_primary_email(access_token: str) -> Optional[str]:
     """Get the user's primary, verified email from GitHub."""
-    async with httpx.AsyncClient(timeout=HTTPX_TIMEOUT, trust_env=False) as client:
-        response = await client.get(
-            "https://api.github.com/user/emails",
-            headers={
-                "Authorization": f"token {access_token}",
-                "Accept": "application/vnd.github+json",
-            },
-        )
+    response = await github_client.get(
+        f"{GITHUB_API_URL}/user/emails",
+        headers={
+            "Authorization": f"token {access_token}",
+            "Accept": "application/vnd.github+json",
+        },
+    )
 
-        if response.status_code != 200:
-            return None
-
-        emails = response.json()
-        if not isinstance(emails, list):
-            return None
-
-        # Prefer primary + verified, then any verified, then any email
-        for e in emails:
-            if e.get("primary") and e.get("verified") and e.get("email"):
-                return e.get("email")
-        for e in emails:
-            if e.get("verified") and e.get("email"):
-                return e.get("email")
-        for e in emails:
-            if e.get("email"):
-                return e.get("email")
+    if response.status_code != 200:
+        return None
 
+    emails = response.json()
+    if not isinstance(emails, list):
         return None
 
+    # Prefer primary + verified, then any verified, then any email
+    for e in emails:
+        if e.get("primary") and e.get("verified") and e.get("email"):
+            return e.get("email")
+    for e in emails:
+        if e.get("verified") and e.get("email"):
+            return e.get("email")
+    for e in emails:
+        if e.get("email"):
+            return e.get("email")
+
+    return None
+
+async def _get_page(url: str, headers: Dict[str, str], semaphore: asyncio.Semaphore) -> httpx.Response:
+    async with semaphore:
+        return await github_client.get(url, headers=headers)
+
+async def _paginate(
+    url: str,
+    headers: Dict[str, str],
+    semaphore: asyncio.Semaphore
+) -> AsyncIterator[httpx.Response]:
+    """Yield every page of a GitHub list endpoint.
+
+    When the first page advertises a ``last`` link, the remaining pages are
+    requested concurrently and yielded as they complete; otherwise ``next``
+    links are followed one by one.
+    """
+    response = await _get_page(url, headers, semaphore)
+    yield response
+    if response.status_code != 200:
+        return
+
+    last_url = response.links.get("last", {}).get("url")
+    if last_url:
+        last = httpx.URL(last_url)
+        last_page = int(last.params.get("page", "1"))
+        page_urls = [str(last.copy_set_param("page", page)) for page in range(2, last_page + 1)]
+        for next_page in asyncio.as_completed([_get_page(u, headers, semaphore) for u in page_urls]):
+            yield await next_page
+        return
+
+    next_url = response.links.get("next", {}).get("url")
+    while next_url:
+        response = await _get_page(next_url, headers, semaphore)
+        yield response
+        if response.status_code != 200:
+            return
+        next_url = response.links.get("next", {}).get("url")
+
+async def iter_github_repos(access_token: str) -> AsyncIterator[List[GitHubRepo]]:
+    """Yield batches of the user's own and organization repositories as pages arrive."""
+    headers = {"Authorization": f"token {access_token}"}
+    semaphore = asyncio.Semaphore(GITHUB_REPOS_CONCURRENCY)
+    pages: asyncio.Queue = asyncio.Queue()
+    seen: Set[int] = set()
+
+    async def collect(url: str, required: bool) -> None:
+        async for response in _paginate(url, headers, semaphore):
+            if response.status_code != 200:
+                if required:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Failed to fetch GitHub repositories"
+                    )
+                return
+            await pages.put(response.json())
+
+    async def collect_orgs() -> None:
+        org_tasks = []
+        async for response in _paginate(f"{GITHUB_API_URL}/user/orgs?per_page=100", headers, semaphore):
+            if response.status_code != 200:
+                break
+            for org in response.json():
+                org_tasks.append(asyncio.create_task(
+                    collect(f"{GITHUB_API_URL}/orgs/{org['login']}/repos?per_page=100", False)
+                ))
+        await asyncio.gather(*org_tasks)
+
+    tasks = [
+        asyncio.create_task(collect(f"{GITHUB_API_URL}/user/repos?type=owner&per_page=100", True)),
+        asyncio.create_task(collect_orgs()),
+    ]
+    producers = asyncio.gather(*tasks)
+    producers.add_done_callback(lambda _: pages.put_nowait(None))
+
+    try:
+        while True:
+            batch = await pages.get()
+            if batch is None:
+                break
+            repos = []
+            for repo in batch:
+                if repo["id"] in seen:
+                    continue
+                seen.add(repo["id"])
+                repos.append(GitHubRepo(**repo))
+            if repos:
+                yield repos
+        await producers
+    finally:
+        for task in tasks:
+            task.cancel()
+
 async def get_github_repos(access_token: str) -> List[GitHubRepo]:
     """Get GitHub repositories for the authenticated user."""
-    async with httpx.AsyncClient(timeout=HTTPX_TIMEOUT, trust_env=False) as client:
-        # Get user repos
-        response = await client.get(
-            "https://api.github.com/user/repos?type=owner&per_page=100",
-            headers={"Authorization": f"token {access_token}"}
-        )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to fetch GitHub repositories"
-            )
-        
-        repos_data = response.json()
-        
-        # Get organizations and their repos
-        orgs_response = await client.get(
-            "https://api.github.com/user/orgs",
-            headers={"Authorization": f"token {access_token}"}
-        )
-        
-        if orgs_response.status_code == 200:
-            orgs = orgs_response.json()
-            for org in orgs:
-                org_repos_response = await client.get(
-                    f"https://api.github.com/orgs/{org['login']}/repos?per_page=100",
-                    headers={"Authorization": f"token {access_token}"}
-                )
-                if org_repos_response.status_code == 200:
-                    repos_data.extend(org_repos_response.json())
-        
-        return [GitHubRepo(**repo) for repo in repos_data]
+    repos = []
+    async for batch in iter_github_repos(access_token):
+        repos.extend(batch)
+    return repos
 
 async def get_github_orgs(access_token: str) -> List[Dict[str, Any]]:
     """Get GitHub organizations for the authenticated user."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://api.github.com/user/orgs",
-            headers={"Authorization": f"token {access_token}"}
+    response = await github_client.get(
+        f"{GITHUB_API_URL}/user/orgs",
+        headers={"Authorization": f"token {access_token}"}
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to fetch GitHub organizations"
         )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to fetch GitHub organizations"
-            )
-        
-        return response.json()
-
-async def check_repo_permissions(access_token: str, repo_owner: str, repo_name: str) -> Dict[str, str]:
+    
+    return response.json()
+
+async def check_repo_permissions(access_token: str, repo_owner: str, repo_name: str) -> Dict[str, bool]:
     """Check if the user has write permissions to a repository."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"https://api.github.com/repos/{repo_owner}/{repo_name}",
-            headers={"Authorization": f"token {access_token}"}
+    response = await github_client.get(
+        f"{GITHUB_API_URL}/repos/{repo_owner}/{repo_name}",
+        headers={"Authorization": f"token {access_token}"}
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Repository not found or no access"
         )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Repository not found or no access"
-            )
-        
-        repo_data = response.json()
-        return repo_data.get("permissions", {})
+    
+    repo_data = response.json()
+    return repo_data.get("permissions", {})
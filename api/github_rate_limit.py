@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import math
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+import os
+
+import httpx
+
+load_dotenv()
+
+# Client-side pacing. Every request spends a token from its access token's
+# bucket; writes additionally spend one from the target repository's bucket
+# (GitHub's secondary limits are mostly about content creation).
+GITHUB_TOKEN_RATE = float(os.getenv("GITHUB_TOKEN_RATE", "10"))
+GITHUB_TOKEN_BURST = float(os.getenv("GITHUB_TOKEN_BURST", "50"))
+GITHUB_REPO_WRITE_RATE = float(os.getenv("GITHUB_REPO_WRITE_RATE", "1"))
+GITHUB_REPO_WRITE_BURST = float(os.getenv("GITHUB_REPO_WRITE_BURST", "20"))
+
+# Below this many remaining requests, spread the rest evenly until reset
+GITHUB_RATE_LIMIT_LOW_WATERMARK = int(os.getenv("GITHUB_RATE_LIMIT_LOW_WATERMARK", "100"))
+
+# Backoff on 403/429 rate-limit responses. Waits (pacing or retries) longer
+# than GITHUB_MAX_RETRY_WAIT raise GitHubRateLimitError instead
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+GITHUB_BACKOFF_BASE = float(os.getenv("GITHUB_BACKOFF_BASE", "1"))
+GITHUB_MAX_RETRY_WAIT = float(os.getenv("GITHUB_MAX_RETRY_WAIT", "60"))
+
+_MAX_TRACKED_KEYS = 10000
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+_REPO_PATH = re.compile(r"^/repos/([^/]+)/([^/]+)")
+
+
+class GitHubRateLimitError(Exception):
+    """GitHub's budget is spent for longer than GITHUB_MAX_RETRY_WAIT; try again at ``reset``."""
+
+    def __init__(self, reset: float):
+        self.reset = reset
+        super().__init__(f"GitHub rate limit exceeded; retry in {self.retry_after}s")
+
+    @property
+    def retry_after(self) -> int:
+        """Whole seconds until the budget is available again."""
+        return max(1, math.ceil(self.reset - time.time()))
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in arrival order."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns the time waited."""
+        async with self._lock:
+            self._refill()
+            waited = 0.0
+            if self.tokens < 1:
+                waited = (1 - self.tokens) / self.rate
+                await asyncio.sleep(waited)
+                self._refill()
+            self.tokens -= 1
+            return waited
+
+
+class RateLimitState:
+    """GitHub's view of a token's budget, as reported by X-RateLimit-* headers."""
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[float] = None
+        self.resource: Optional[str] = None
+
+    def update(self, headers: httpx.Headers) -> None:
+        if "x-ratelimit-remaining" not in headers:
+            return
+        try:
+            self.remaining = int(headers["x-ratelimit-remaining"])
+            self.limit = int(headers.get("x-ratelimit-limit", self.limit or 0))
+            self.reset = float(headers.get("x-ratelimit-reset", self.reset or 0))
+        except ValueError:
+            return
+        self.resource = headers.get("x-ratelimit-resource", self.resource)
+
+    def pacing_delay(self) -> float:
+        """How long to wait before spending the next request of this budget.
+
+        Raises GitHubRateLimitError rather than wait longer than GITHUB_MAX_RETRY_WAIT.
+        """
+        if self.remaining is None or self.reset is None:
+            return 0.0
+        until_reset = max(0.0, self.reset - time.time())
+        if self.remaining <= 0:
+            delay = until_reset
+        elif self.remaining < GITHUB_RATE_LIMIT_LOW_WATERMARK:
+            delay = until_reset / self.remaining
+        else:
+            return 0.0
+        if delay > GITHUB_MAX_RETRY_WAIT:
+            raise GitHubRateLimitError(time.time() + delay)
+        return delay
+
+
+class RateLimitScheduler:
+    """Paces GitHub requests per access token and per repository.
+
+    Requests first wait on client-side token buckets, then on the budget
+    GitHub last reported for the token. Responses that signal a primary or
+    secondary rate limit (403/429) are retried after ``Retry-After``, the
+    reset time, or exponential backoff with full jitter. Anything that would
+    wait longer than GITHUB_MAX_RETRY_WAIT raises GitHubRateLimitError.
+    """
+
+    def __init__(self):
+        self._token_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._repo_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._states: "OrderedDict[str, RateLimitState]" = OrderedDict()
+        self.throttled_total = 0
+        self.throttled_seconds_total = 0.0
+        self.retries_total = 0
+
+    @staticmethod
+    def token_key(headers: Optional[Dict[str, str]]) -> str:
+        authorization = (headers or {}).get("Authorization")
+        if not authorization:
+            return "anonymous"
+        return hashlib.sha256(authorization.encode()).hexdigest()[:12]
+
+    @staticmethod
+    def repo_key(url: str) -> Optional[str]:
+        match = _REPO_PATH.match(httpx.URL(url).path)
+        if not match:
+            return None
+        return f"{match.group(1)}/{match.group(2)}".lower()
+
+    def _get(self, table: OrderedDict, key: str, factory):
+        value = table.get(key)
+        if value is None:
+            value = table[key] = factory()
+            if len(table) > _MAX_TRACKED_KEYS:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(key)
+        return value
+
+    async def acquire(self, method: str, url: str, headers: Optional[Dict[str, str]]) -> None:
+        token_key = self.token_key(headers)
+        waited = await self._get(
+            self._token_buckets, token_key, lambda: TokenBucket(GITHUB_TOKEN_RATE, GITHUB_TOKEN_BURST)
+        ).acquire()
+
+        repo_key = self.repo_key(url)
+        if repo_key and method.upper() in _WRITE_METHODS:
+            waited += await self._get(
+                self._repo_buckets, repo_key, lambda: TokenBucket(GITHUB_REPO_WRITE_RATE, GITHUB_REPO_WRITE_BURST)
+            ).acquire()
+
+        state = self._get(self._states, token_key, RateLimitState)
+        delay = state.pacing_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+        if state.remaining is not None:
+            # Count the request against the budget until GitHub reports again
+            state.remaining = max(0, state.remaining - 1)
+
+        if waited > 0:
+            self.throttled_total += 1
+            self.throttled_seconds_total += waited
+
+    def observe(self, headers: Optional[Dict[str, str]], response: httpx.Response) -> None:
+        self._get(self._states, self.token_key(headers), RateLimitState).update(response.headers)
+
+    def retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a rate-limited response, or None if it should not be retried.
+
+        Raises GitHubRateLimitError when the wait would exceed GITHUB_MAX_RETRY_WAIT.
+        """
+        if response.status_code not in (403, 429) or attempt >= GITHUB_MAX_RETRIES:
+            return None
+
+        retry_after = response.headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = None
+        elif response.headers.get("x-ratelimit-remaining") == "0":
+            reset = float(response.headers.get("x-ratelimit-reset", time.time()))
+            delay = max(0.0, reset - time.time())
+        elif response.status_code == 429 or "rate limit" in response.text.lower():
+            delay = None
+        else:
+            # A plain permission error
+            return None
+
+        if delay is None:
+            delay = random.uniform(0, GITHUB_BACKOFF_BASE * (2 ** attempt))
+        else:
+            delay += random.uniform(0, GITHUB_BACKOFF_BASE)
+
+        if delay > GITHUB_MAX_RETRY_WAIT:
+            raise GitHubRateLimitError(time.time() + delay)
+
+        self.retries_total += 1
+        return delay
+
+    def lowest_remaining(self) -> Dict[str, int]:
+        """The smallest remaining budget any token last reported, per resource."""
+        lowest: Dict[str, int] = {}
+        for state in self._states.values():
+            if state.remaining is None:
+                continue
+            resource = state.resource or "core"
+            lowest[resource] = min(lowest.get(resource, state.remaining), state.remaining)
+        return lowest
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current budgets, keyed by token fingerprint and repository."""
+        return {
+            "tokens": {
+                key: {
+                    "limit": state.limit,
+                    "remaining": state.remaining,
+                    "reset": state.reset,
+                    "resource": state.resource,
+                    "bucket_tokens": round(self._token_buckets[key].tokens, 2)
+                    if key in self._token_buckets else None,
+                }
+                for key, state in self._states.items()
+            },
+            "repos": {
+                key: {"bucket_tokens": round(bucket.tokens, 2)}
+                for key, bucket in self._repo_buckets.items()
+            },
+            "throttled_total": self.throttled_total,
+            "throttled_seconds_total": round(self.throttled_seconds_total, 3),
+            "retries_total": self.retries_total,
+        }
+
+
+# Global instance
+rate_limit_scheduler = RateLimitScheduler()
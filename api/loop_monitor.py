@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Optional
+from dotenv import load_dotenv
+
+from metrics import metrics_registry
+from profiling import collapse_stack
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How often the loop is pinged; 0 turns the monitor off
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.05"))
+# A ping late by more than this is a stall: its stack and route are recorded
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))
+LOOP_BLOCK_LOG_SIZE = int(os.getenv("LOOP_BLOCK_LOG_SIZE", "50"))
+LOOP_BLOCK_MAX_SAMPLES = int(os.getenv("LOOP_BLOCK_MAX_SAMPLES", "200"))
+
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+loop_lag = metrics_registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer, sampled every LOOP_MONITOR_INTERVAL.",
+    buckets=LAG_BUCKETS
+)
+loop_blocks = metrics_registry.counter(
+    "event_loop_blocks_total", "Event-loop stalls over LOOP_BLOCK_THRESHOLD, by the route that was running.", ("route",)
+)
+loop_blocked_seconds = metrics_registry.counter(
+    "event_loop_blocked_seconds_total", "Time the event loop spent stalled, by the route that was running.", ("route",)
+)
+
+
+class LoopMonitor:
+    """Measures event-loop lag and catches the code that blocks the loop.
+
+    A task on the loop sleeps for LOOP_MONITOR_INTERVAL and records how late
+    it wakes up. A watchdog thread notices when that heartbeat stops for
+    longer than LOOP_BLOCK_THRESHOLD and, while the stall lasts, samples the
+    loop thread's stack. The stall is charged to the request whose
+    middleware frame is on that stack ("background" for anything else, such
+    as the publish worker). Blocks are counted from the measured lag, so
+    they are exact even when a stall was too short to sample.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        threshold: float = LOOP_BLOCK_THRESHOLD,
+        log_size: int = LOOP_BLOCK_LOG_SIZE
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=log_size)
+        self.max_lag = 0.0
+        self.blocks_total = 0
+        self._requests: Dict[int, dict] = {}
+        self._beat = 0.0
+        self._stall: Optional[Dict[str, Any]] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    async def start(self) -> None:
+        """Start monitoring the running loop."""
+        if not self.enabled or self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._task = asyncio.create_task(self._heartbeat())
+        if self.threshold > 0:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+            self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def track(self, frame, scope) -> None:
+        self._requests[id(frame)] = scope
+
+    def untrack(self, frame) -> None:
+        self._requests.pop(id(frame), None)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            start = self._beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - start - self.interval)
+            loop_lag.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            stall, self._stall = self._stall, None
+            if self.threshold > 0 and lag > self.threshold:
+                self._record(lag, stall if stall is not None and stall["beat"] == start else None)
+
+    def _owner(self, frame) -> str:
+        while frame is not None:
+            scope = self._requests.get(id(frame))
+            if scope is not None:
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                return f"{scope['method']} {route}"
+            frame = frame.f_back
+        return "background"
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stopping.wait(poll):
+            beat = self._beat
+            if time.perf_counter() - beat <= self.interval + self.threshold:
+                continue
+            stall = self._stall
+            if stall is None or stall["beat"] != beat:
+                stall = self._stall = {"beat": beat, "owners": Counter(), "stacks": Counter(), "samples": 0}
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None and stall["samples"] < LOOP_BLOCK_MAX_SAMPLES:
+                stall["owners"][self._owner(frame)] += 1
+                stall["stacks"][collapse_stack(frame)] += 1
+                stall["samples"] += 1
+
+    def _record(self, blocked: float, stall: Optional[Dict[str, Any]]) -> None:
+        # Stalls too short for the watchdog to sample have no stack or route
+        route = stall["owners"].most_common(1)[0][0] if stall and stall["owners"] else "unknown"
+        loop_blocks.inc(route=route)
+        loop_blocked_seconds.inc(blocked, route=route)
+        self.blocks_total += 1
+        self.recent.append({
+            "route": route,
+            "blocked_ms": round(blocked * 1000, 3),
+            "ended_at": datetime.now(timezone.utc).isoformat(),
+            "samples": stall["samples"] if stall else 0,
+            "stacks": dict(stall["stacks"].most_common(10)) if stall else {},
+        })
+        logger.warning("Event loop blocked for %.0f ms by %s", blocked * 1000, route)
+
+    def snapshot(self, limit: int = 50) -> Dict[str, Any]:
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "blocks_total": self.blocks_total,
+            "blocks": list(self.recent)[-limit:][::-1],
+        }
+
+
+# Global instance
+loop_monitor = LoopMonitor()
+
+
+class LoopMonitorMiddleware:
+    """ASGI middleware that lets the loop monitor see which request is running."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not loop_monitor.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        frame = sys._getframe()
+        loop_monitor.track(frame, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_monitor.untrack(frame)
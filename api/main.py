@@ -1,17 +1,43 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import REAL, cast, func, literal, literal_column, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pydantic import TypeAdapter, ValidationError
+from typing import Any, List, Optional, Tuple
+import asyncio
+import hashlib
+import io
+import json
 import os
+import re
+import tarfile
 from dotenv import load_dotenv
 
-from database import get_db, engine, Base
-from models import User, Confab, GitHubAccount
-from schemas import UserCreate, UserLogin, UserResponse, ConfabCreate, ConfabResponse, GitHubConnect, GitHubLogin, ConfabConfig, SimpleConfabConfig
-from auth import create_access_token, verify_token, get_password_hash, verify_password
-from github_oauth import github_auth_router, get_github_user, get_github_repos, get_github_primary_email
-from confab_manager import create_confab_in_github, update_confab_in_github
+from database import get_db, open_session, engine, Base, pool_metrics
+from models import User, Confab, GitHubAccount, PublishJob, confab_search_vector
+from schemas import UserCreate, UserLogin, UserResponse, ConfabCreate, ConfabListItem, ConfabResponse, GitHubConnect, GitHubLogin, ConfabConfig, SimpleConfabConfig, PublishJobResponse, ConfabSearchResult, ConfabBulkResult
+from auth import create_access_token, verify_token, get_password_hash_async, verify_password_async, password_hash_pool
+from github_oauth import github_auth_router, get_github_user, get_github_repos, iter_github_repos, get_github_primary_email
+from github_client import github_client
+from github_rate_limit import GitHubRateLimitError, rate_limit_scheduler
+from principal_cache import principal_cache
+from confab_cache import CachedResponse, confab_cache
+from responses import DefaultResponse, ModelResponse
+from publish_queue import publish_queue
+from confab_manager import confab_manager
+from confab_templates import confab_template_data
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics_authorized, metrics_registry
+from tracing import TracingMiddleware, tracer
+from loop_monitor import LoopMonitorMiddleware, loop_monitor
+from profiling import PROFILE_MAX_SECONDS, SlowRequestMiddleware, format_collapsed, profile_process, slow_request_sampler
 
 # Load environment variables
 load_dotenv()
@@ -23,7 +49,25 @@ except Exception as e:
     print(f"Warning: Could not connect to database: {e}")
     print("API will start but database operations will fail until database is available.")
 
-app = FastAPI(title="Let's Confab API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared GitHub connection pool for the lifetime of the app
+    await github_client.start()
+    tracer.start()
+    slow_request_sampler.start()
+    await loop_monitor.start()
+    await publish_queue.start()
+    try:
+        yield
+    finally:
+        await publish_queue.stop()
+        await loop_monitor.stop()
+        await github_client.close()
+        password_hash_pool.shutdown()
+        tracer.shutdown()
+        slow_request_sampler.stop()
+
+app = FastAPI(title="Let's Confab API", version="1.0.0", lifespan=lifespan, default_response_class=DefaultResponse)
 
 # CORS middleware
 allowed_origins_env = os.getenv("ALLOWED_ORIGINS")
@@ -40,16 +84,251 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics and tracing (outermost, so CORS and errors are timed too)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(SlowRequestMiddleware)
+app.add_middleware(LoopMonitorMiddleware)
+
 # Security
 security = HTTPBearer()
 
+# Users allowed to use the /admin endpoints
+admin_emails_env = os.getenv("ADMIN_EMAILS", "")
+admin_emails = {email.strip().lower() for email in admin_emails_env.split(",") if email.strip()}
+
 # Include GitHub OAuth routes
 app.include_router(github_auth_router, prefix="/auth/github", tags=["github"])
 
+@app.exception_handler(GitHubRateLimitError)
+async def github_rate_limit_handler(request: Request, exc: GitHubRateLimitError):
+    # GitHub won't take more requests for a while; tell the client when to come back
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "GitHub rate limit exceeded, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# GET /confabs pagination
+CONFAB_PAGE_SIZE = int(os.getenv("CONFAB_PAGE_SIZE", "100"))
+CONFAB_MAX_PAGE_SIZE = int(os.getenv("CONFAB_MAX_PAGE_SIZE", "500"))
+
+# Bulk import/export
+CONFAB_BULK_BATCH_SIZE = int(os.getenv("CONFAB_BULK_BATCH_SIZE", "500"))
+CONFAB_BULK_MAX_ITEMS = int(os.getenv("CONFAB_BULK_MAX_ITEMS", "5000"))
+CONFAB_BULK_MAX_LINE_BYTES = int(os.getenv("CONFAB_BULK_MAX_LINE_BYTES", str(1024 * 1024)))
+CONFAB_EXPORT_BATCH_SIZE = int(os.getenv("CONFAB_EXPORT_BATCH_SIZE", "500"))
+
+# Columns a confab list can return; config is deliberately not listable
+CONFAB_LIST_COLUMNS = {
+    "id": Confab.id,
+    "name": Confab.name,
+    "description": Confab.description,
+    "version": Confab.version,
+    "status": Confab.status,
+    "github_url": Confab.github_url,
+    "created_at": Confab.created_at,
+    "updated_at": Confab.updated_at,
+}
+
+# Confab responses are validated once and serialized directly, so the bytes
+# can be cached. ORM objects go through from_attributes; column rows are
+# validated as dicts, which is several times faster than attribute access
+confab_adapter = TypeAdapter(ConfabResponse)
+confab_list_adapter = TypeAdapter(list[ConfabListItem])
+confab_search_adapter = TypeAdapter(list[ConfabSearchResult])
+
+def _etag(*parts: Any) -> str:
+    """Weak ETag over the values a response is rendered from."""
+    return f'W/"{hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+def _confab_read_response(request: Request, cached: CachedResponse) -> Response:
+    """The cached body, or 304 Not Modified when the client already has it."""
+    headers = {**cached.headers, "ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+def _encode_cursor(created_at: datetime, confab_id: int) -> str:
+    return urlsafe_b64encode(f"{created_at.isoformat()}|{confab_id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, confab_id = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(confab_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _encode_search_cursor(rank: float, confab_id: int) -> str:
+    return urlsafe_b64encode(f"{rank!r}|{confab_id}".encode()).decode()
+
+def _decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        rank, confab_id = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(rank), int(confab_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+_CONFIG_PATH_SEGMENT = re.compile(r"^[A-Za-z0-9_]+$")
+
+def _parse_config_match(match: str) -> Tuple[Tuple[str, ...], Any]:
+    """Parse a ``dotted.path=value`` config filter; the value is JSON if it parses, else a string."""
+    path, sep, raw = match.partition("=")
+    segments = tuple(path.split("."))
+    if not sep or not all(_CONFIG_PATH_SEGMENT.match(segment) for segment in segments):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid config filter: {match}"
+        )
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    if not isinstance(value, (str, bool, int, float)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Config filters only match scalar values: {match}"
+        )
+    return segments, value
+
+def _config_match_clause(segments: Tuple[str, ...], value: Any):
+    if engine.dialect.name == "postgresql":
+        # Containment is answered by the GIN index on config
+        document = value
+        for segment in reversed(segments):
+            document = {segment: document}
+        return Confab.config.op("@>")(cast(literal(json.dumps(document)), JSONB))
+    element = Confab.config[segments]
+    if isinstance(value, bool):
+        return element.as_boolean() == value
+    if isinstance(value, int):
+        return element.as_integer() == value
+    if isinstance(value, float):
+        return element.as_float() == value
+    return element.as_string() == value
+
+def confab_list_query(
+    user_id: int,
+    columns: list,
+    limit: int,
+    status_filter: Optional[str] = None,
+    name: Optional[str] = None,
+    cursor: Optional[str] = None,
+    config_matches: Optional[List[str]] = None
+):
+    """Build the keyset-paginated confab list query (also used by check_query_plans.py)."""
+    query = select(*columns).where(Confab.user_id == user_id)
+    if status_filter:
+        query = query.where(Confab.status == status_filter)
+    if name:
+        query = query.where(Confab.name.ilike(f"%{_escape_like(name)}%", escape="\\"))
+    for match in config_matches or []:
+        query = query.where(_config_match_clause(*_parse_config_match(match)))
+    if cursor:
+        created_at, confab_id = _decode_cursor(cursor)
+        # Compare against the stored timestamp of the cursor row so the
+        # boundary is exact regardless of how the driver binds datetimes;
+        # fall back to the encoded value if that row has since been deleted
+        cursor_row = aliased(Confab)
+        cursor_created_at = select(cursor_row.created_at).where(
+            cursor_row.id == confab_id,
+            cursor_row.user_id == user_id
+        ).scalar_subquery()
+        query = query.where(
+            tuple_(Confab.created_at, Confab.id) < tuple_(func.coalesce(cursor_created_at, created_at), confab_id)
+        )
+    return query.order_by(Confab.created_at.desc(), Confab.id.desc()).limit(limit)
+
+def confab_search_query(user_id: int, columns: list, q: str, limit: int, cursor: Optional[str] = None):
+    """Build the ranked confab search query (also used by check_query_plans.py)."""
+    if engine.dialect.name == "postgresql":
+        ts_query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+        rank = func.ts_rank_cd(confab_search_vector, ts_query)
+        matches = confab_search_vector.op("@@")(ts_query)
+    else:
+        # No full-text index elsewhere: unranked substring match
+        rank = literal(0.0)
+        pattern = f"%{_escape_like(q)}%"
+        matches = or_(
+            Confab.name.ilike(pattern, escape="\\"),
+            Confab.description.ilike(pattern, escape="\\")
+        )
+    rank = rank.label("rank")
+    query = select(*columns, rank).where(Confab.user_id == user_id, matches)
+    if cursor:
+        cursor_rank, confab_id = _decode_search_cursor(cursor)
+        # ts_rank_cd returns real; compare at that precision
+        query = query.where(tuple_(rank, Confab.id) < tuple_(cast(cursor_rank, REAL), confab_id))
+    return query.order_by(rank.desc(), Confab.id.desc()).limit(limit)
+
+async def _ndjson_lines(request: Request):
+    """Yield (line number, line) for each non-blank line of a streamed NDJSON body."""
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+        if len(buffer) > CONFAB_BULK_MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Line {line_number + 1} exceeds {CONFAB_BULK_MAX_LINE_BYTES} bytes"
+            )
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+async def _iter_confab_rows(db: AsyncSession, user_id: int, columns: list):
+    """Walk all of a user's confabs in keyset-paginated batches."""
+    cursor = None
+    while True:
+        rows = (await db.execute(confab_list_query(user_id, columns, CONFAB_EXPORT_BATCH_SIZE, cursor=cursor))).all()
+        for row in rows:
+            yield row
+        if len(rows) < CONFAB_EXPORT_BATCH_SIZE:
+            return
+        cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+def _bump_version(version: str) -> str:
+    """Increment the patch component of a semantic version."""
+    parts = version.split(".")
+    try:
+        parts[-1] = str(int(parts[-1]) + 1)
+    except ValueError:
+        return version
+    return ".".join(parts)
+
+def _cache_principal(db: AsyncSession, user: User) -> None:
+    """Detach a fully loaded user from the session and cache it for later requests."""
+    if user.github_account is not None:
+        db.expunge(user.github_account)
+    db.expunge(user)
+    principal_cache.set(user.id, user)
+
 # Helper function to get current user
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     token = credentials.credentials
     payload = verify_token(token)
@@ -59,22 +338,39 @@ async def get_current_user(
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.id == payload.get("user_id")).first()
+    user_id = payload.get("user_id")
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    # Load the user and their GitHub account in one query
+    user = await db.scalar(
+        select(User).options(joinedload(User.github_account)).where(User.id == user_id)
+    )
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
+    _cache_principal(db, user)
     return user
 
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.email.lower() not in admin_emails:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
 @app.get("/")
 async def root():
     return {"message": "Let's Confab API"}
 
 @app.post("/auth/register", response_model=UserResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -82,7 +378,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         name=user.name,
         email=user.email,
@@ -92,13 +388,13 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Create access token
     access_token = create_access_token(data={"user_id": db_user.id})
     
-    return UserResponse(
+    return ModelResponse(UserResponse(
         id=db_user.id,
         name=db_user.name,
         email=db_user.email,
@@ -108,13 +404,15 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         access_token=access_token,
         created_at=db_user.created_at,
         updated_at=db_user.updated_at,
-    )
+    ))
 
 @app.post("/auth/login", response_model=UserResponse)
-async def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
     # Find user by email
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.password_hash):
+    db_user = await db.scalar(
+        select(User).options(joinedload(User.github_account)).where(User.email == user.email)
+    )
+    if not db_user or not await verify_password_async(user.password, db_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -123,9 +421,10 @@ async def login(user: UserLogin, db: Session = Depends(get_db)):
     # Create access token
     access_token = create_access_token(data={"user_id": db_user.id})
     
-    github_account = db.query(GitHubAccount).filter(GitHubAccount.user_id == db_user.id).first()
+    github_account = db_user.github_account
+    _cache_principal(db, db_user)
     
-    return UserResponse(
+    return ModelResponse(UserResponse(
         id=db_user.id,
         name=db_user.name,
         email=db_user.email,
@@ -135,16 +434,13 @@ async def login(user: UserLogin, db: Session = Depends(get_db)):
         access_token=access_token,
         created_at=db_user.created_at,
         updated_at=db_user.updated_at,
-    )
+    ))
 
 @app.get("/auth/me", response_model=UserResponse)
-async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    github_account = db.query(GitHubAccount).filter(GitHubAccount.user_id == current_user.id).first()
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
+    github_account = current_user.github_account
     
-    return UserResponse(
+    return ModelResponse(UserResponse(
         id=current_user.id,
         name=current_user.name,
         email=current_user.email,
@@ -153,16 +449,16 @@ async def get_current_user_info(
         github_connected=github_account is not None,
         created_at=current_user.created_at,
         updated_at=current_user.updated_at,
-    )
+    ))
 
 @app.post("/auth/github/connect")
 async def connect_github(
     github_data: GitHubConnect,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Check if GitHub account is already connected
-    existing_github = db.query(GitHubAccount).filter(GitHubAccount.user_id == current_user.id).first()
+    existing_github = await db.scalar(select(GitHubAccount).where(GitHubAccount.user_id == current_user.id))
     if existing_github:
         # Update existing connection
         existing_github.github_id = github_data.github_id
@@ -182,32 +478,33 @@ async def connect_github(
         )
         db.add(github_account)
     
-    db.commit()
+    await db.commit()
+    principal_cache.invalidate(current_user.id)
     return {"message": "GitHub account connected successfully"}
 
 @app.post("/auth/github/login", response_model=UserResponse)
-async def github_login(github_data: GitHubLogin, db: Session = Depends(get_db)):
+async def github_login(github_data: GitHubLogin, db: AsyncSession = Depends(get_db)):
     # Fetch email from GitHub so we can identify/create the app user
     github_email = await get_github_primary_email(github_data.access_token)
     if not github_email:
         github_email = f"{github_data.github_username}@users.noreply.github.com"
 
-    db_user = db.query(User).filter(User.email == github_email).first()
+    db_user = await db.scalar(select(User).where(User.email == github_email))
     if not db_user:
         # Create a new user with placeholder required fields
         db_user = User(
             name=github_data.github_username,
             email=github_email,
-            password_hash=get_password_hash(os.urandom(24).hex()),
+            password_hash=await get_password_hash_async(os.urandom(24).hex()),
             country="other",
             timezone="utc",
         )
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
 
     # Upsert GitHubAccount association
-    github_account = db.query(GitHubAccount).filter(GitHubAccount.user_id == db_user.id).first()
+    github_account = await db.scalar(select(GitHubAccount).where(GitHubAccount.user_id == db_user.id))
     if github_account:
         github_account.github_id = github_data.github_id
         github_account.github_username = github_data.github_username
@@ -224,10 +521,11 @@ async def github_login(github_data: GitHubLogin, db: Session = Depends(get_db)):
             selected_org=github_data.selected_org,
         )
         db.add(github_account)
-    db.commit()
+    await db.commit()
+    principal_cache.invalidate(db_user.id)
 
     access_token = create_access_token(data={"user_id": db_user.id})
-    return UserResponse(
+    return ModelResponse(UserResponse(
         id=db_user.id,
         name=db_user.name,
         email=db_user.email,
@@ -237,110 +535,471 @@ async def github_login(github_data: GitHubLogin, db: Session = Depends(get_db)):
         access_token=access_token,
         created_at=db_user.created_at,
         updated_at=db_user.updated_at,
-    )
+    ))
 
 @app.get("/auth/github/repos")
 async def get_user_github_repos(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    stream: bool = False,
+    current_user: User = Depends(get_current_user)
 ):
-    github_account = db.query(GitHubAccount).filter(GitHubAccount.user_id == current_user.id).first()
+    github_account = current_user.github_account
     if not github_account:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="GitHub account not connected"
         )
     
+    if stream:
+        # Emit one repo per line as pages arrive instead of waiting for all of them
+        async def repo_lines(access_token: str):
+            try:
+                async for batch in iter_github_repos(access_token):
+                    for repo in batch:
+                        yield repo.model_dump_json() + "\n"
+            except HTTPException as e:
+                yield json.dumps({"error": e.detail}) + "\n"
+            except GitHubRateLimitError as e:
+                yield json.dumps({"error": str(e), "retry_after": e.retry_after}) + "\n"
+        
+        return StreamingResponse(repo_lines(github_account.access_token), media_type="application/x-ndjson")
+    
     repos = await get_github_repos(github_account.access_token)
     return {"repos": repos}
 
-@app.post("/confabs", response_model=ConfabResponse)
+@app.get("/github/rate-limits")
+async def get_github_rate_limits(admin: User = Depends(get_admin_user)):
+    return rate_limit_scheduler.snapshot()
+
+@app.get("/auth/password-pool")
+async def get_password_pool_stats(admin: User = Depends(get_admin_user)):
+    return password_hash_pool.snapshot()
+
+@app.get("/db/pool")
+async def get_db_pool_stats(admin: User = Depends(get_admin_user)):
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+
+# Metrics read from live state at scrape time
+def _pool_samples(field: str):
+    def read():
+        for name, metrics in pool_metrics.items():
+            snapshot = metrics.snapshot()
+            if field in snapshot:
+                yield {"engine": name}, snapshot[field]
+    return read
+
+for name, field, kind, documentation in [
+    ("db_pool_size", "size", "gauge", "Connections the pool keeps open."),
+    ("db_pool_checked_out", "checked_out", "gauge", "Connections currently checked out of the pool."),
+    ("db_pool_overflow", "overflow", "gauge", "Connections open beyond the pool size."),
+    ("db_pool_checkouts_total", "checkouts", "counter", "Connection checkouts from the pool."),
+    ("db_pool_timeouts_total", "timeouts", "counter", "Checkouts that timed out waiting for a connection."),
+    ("db_pool_invalidations_total", "invalidations", "counter", "Pooled connections invalidated."),
+    ("db_pool_wait_seconds_total", "wait_seconds_total", "counter", "Time spent waiting for a pooled connection."),
+]:
+    metrics_registry.callback(name, documentation, _pool_samples(field), kind)
+
+metrics_registry.callback(
+    "password_hash_queue_depth", "Password hashes waiting for a free bcrypt worker.",
+    lambda: [({}, password_hash_pool.snapshot()["queue_depth"])]
+)
+metrics_registry.callback(
+    "password_hash_pending", "Password hashes queued or running.",
+    lambda: [({}, password_hash_pool.snapshot()["pending"])]
+)
+metrics_registry.callback(
+    "password_hash_rejected_total", "Password hashes rejected because the queue was full.",
+    lambda: [({}, password_hash_pool.snapshot()["rejected"])], "counter"
+)
+metrics_registry.callback(
+    "github_rate_limit_remaining", "Lowest remaining GitHub budget across tokens, by resource.",
+    lambda: [
+        ({"resource": resource}, remaining)
+        for resource, remaining in rate_limit_scheduler.lowest_remaining().items()
+    ]
+)
+metrics_registry.callback(
+    "github_throttled_seconds_total", "Time GitHub requests were held back by the rate-limit scheduler.",
+    lambda: [({}, rate_limit_scheduler.throttled_seconds_total)], "counter"
+)
+metrics_registry.callback(
+    "github_cache_hits_total", "GitHub GET requests answered from the conditional-request cache.",
+    lambda: [({}, github_client.cache.hits)] if github_client.cache else [], "counter"
+)
+
+metrics_registry.callback(
+    "confab_cache_hits_total", "Confab reads answered from the per-user read cache.",
+    lambda: [({}, confab_cache.hits)], "counter"
+)
+metrics_registry.callback(
+    "confab_cache_misses_total", "Confab reads that missed the per-user read cache.",
+    lambda: [({}, confab_cache.misses)], "counter"
+)
+
+metrics_registry.callback(
+    "tracing_spans_exported_total", "Spans handed to the trace exporter.",
+    lambda: [({}, tracer.exported)], "counter"
+)
+metrics_registry.callback(
+    "tracing_spans_dropped_total", "Spans dropped because the export queue was full.",
+    lambda: [({}, tracer.dropped)], "counter"
+)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    if not metrics_authorized(request.headers.get("authorization")):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+metrics_registry.callback(
+    "slow_requests_total", "Requests that took longer than SLOW_REQUEST_THRESHOLD.",
+    lambda: [({}, slow_request_sampler.slow_total)], "counter"
+)
+
+metrics_registry.callback(
+    "event_loop_lag_max_seconds", "Largest event-loop lag seen since the worker started.",
+    lambda: [({}, loop_monitor.max_lag)] if loop_monitor.enabled else []
+)
+
+@app.get("/admin/profile", include_in_schema=False)
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    include_idle: bool = False,
+    admin: User = Depends(get_admin_user)
+):
+    """Sample this worker's threads and return collapsed stacks for a flamegraph."""
+    try:
+        stacks = await asyncio.to_thread(profile_process, seconds, interval_ms / 1000, include_idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    pid = os.getpid()
+    return PlainTextResponse(format_collapsed(stacks), headers={
+        "Content-Disposition": f'attachment; filename="profile-{pid}-{int(datetime.now().timestamp())}.collapsed"',
+        "X-Worker-Pid": str(pid),
+    })
+
+@app.get("/admin/slow-requests", include_in_schema=False)
+async def list_slow_requests(
+    limit: int = Query(20, ge=1, le=500),
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    admin: User = Depends(get_admin_user)
+):
+    """Recent requests over the slow-request threshold, newest first."""
+    snapshot = slow_request_sampler.snapshot(limit)
+    if format == "collapsed":
+        stacks = {}
+        for request in snapshot["requests"]:
+            for stack, count in request["stacks"].items():
+                key = f"{request['method']} {request['route']};{stack}"
+                stacks[key] = stacks.get(key, 0) + count
+        return PlainTextResponse(format_collapsed(stacks))
+    snapshot["worker_pid"] = os.getpid()
+    return snapshot
+
+@app.get("/admin/loop-blocks", include_in_schema=False)
+async def list_loop_blocks(
+    limit: int = Query(20, ge=1, le=500),
+    admin: User = Depends(get_admin_user)
+):
+    """Recent event-loop stalls with the route and stacks that caused them, newest first."""
+    snapshot = loop_monitor.snapshot(limit)
+    snapshot["worker_pid"] = os.getpid()
+    return snapshot
+
+@app.post("/confabs", response_model=ConfabResponse, status_code=status.HTTP_202_ACCEPTED)
 async def create_confab(
     confab: ConfabCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Create confab in database
     db_confab = Confab(
         name=confab.name,
         description=confab.description,
+        config=confab.config.model_dump(mode="json") if confab.config else None,
         user_id=current_user.id,
         version="1.0.0",
         status="draft"
     )
     
     db.add(db_confab)
-    db.commit()
-    db.refresh(db_confab)
+    await db.flush()
     
-    # Create confab in GitHub
-    github_account = db.query(GitHubAccount).filter(GitHubAccount.user_id == current_user.id).first()
+    # Publish to GitHub in the background
+    job = await publish_queue.enqueue(db, db_confab, "create", confab.model_dump(mode="json"))
+    await db.commit()
+    confab_cache.invalidate(current_user.id)
+    await db.refresh(db_confab)
+    publish_queue.notify()
     
-    if github_account:
-        # Use user's connected repo
-        repo_owner = github_account.selected_org or github_account.github_username
-        repo_name = github_account.selected_repo
+    confab_response = ConfabResponse.model_validate(db_confab)
+    confab_response.publish_job_id = job.id
+    return ModelResponse(confab_response, status_code=status.HTTP_202_ACCEPTED)
+
+@app.get("/confabs", response_model=list[ConfabListItem])
+async def get_user_confabs(
+    request: Request,
+    limit: int = Query(default=CONFAB_PAGE_SIZE, ge=1, le=CONFAB_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    name: Optional[str] = None,
+    match: List[str] = Query(default=[]),
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    cache_key = f"{request.url.path}?{request.url.query}"
+    cached = confab_cache.get(current_user.id, cache_key)
+    if cached is not None:
+        return _confab_read_response(request, cached)
+    generation = confab_cache.generation
+    
+    # Project only the listed columns; config is never loaded for list views
+    if fields:
+        field_names = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in field_names if f not in CONFAB_LIST_COLUMNS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        if "id" not in field_names:
+            field_names.insert(0, "id")
     else:
-        # Use default confabs repo
-        repo_owner = "letsconfab"
-        repo_name = "confabs"
+        field_names = list(CONFAB_LIST_COLUMNS)
     
-    try:
-        github_url = await create_confab_in_github(
-            confab_name=confab.name,
-            confab_data=confab.dict(),
-            repo_owner=repo_owner,
-            repo_name=repo_name,
-            access_token=github_account.access_token if github_account else None
+    columns = [CONFAB_LIST_COLUMNS[f] for f in field_names]
+    if "created_at" not in field_names:
+        columns.append(Confab.created_at)
+    
+    query = confab_list_query(current_user.id, columns, limit + 1, status_filter, name, cursor, match)
+    
+    rows = (await db.execute(query)).all()
+    
+    # Fetching one extra row tells us whether there is a next page
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    
+    # The page is a function of its rows, so polling clients get a 304
+    # without anything being serialized
+    etag = _etag(field_names, [tuple(row) for row in rows], headers.get("X-Next-Cursor"))
+    if _etag_matches(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={**headers, "ETag": etag, "Cache-Control": "private, no-cache"}
         )
+    
+    if fields:
+        # Sparse fieldsets bypass the full response model
+        body = JSONResponse(
+            content=jsonable_encoder([{f: getattr(row, f) for f in field_names} for row in rows])
+        ).body
+    else:
+        body = confab_list_adapter.dump_json(confab_list_adapter.validate_python([row._asdict() for row in rows]))
+    
+    cached = CachedResponse(etag, body, headers)
+    confab_cache.set(current_user.id, cache_key, cached, generation)
+    return _confab_read_response(request, cached)
+
+@app.get("/confabs/search", response_model=list[ConfabSearchResult])
+async def search_confabs(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(default=CONFAB_PAGE_SIZE, ge=1, le=CONFAB_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    query = confab_search_query(current_user.id, list(CONFAB_LIST_COLUMNS.values()), q, limit + 1, cursor)
+    rows = (await db.execute(query)).all()
+    
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_search_cursor(rows[-1].rank, rows[-1].id)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    
+    return ModelResponse(confab_search_adapter.validate_python([row._asdict() for row in rows]), headers=headers)
+
+@app.post("/confabs/bulk", response_model=ConfabBulkResult, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_create_confabs(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # One ConfabCreate per NDJSON line; invalid lines are reported, not fatal
+    errors = []
+    confab_ids = []
+    pending = []
+    committed = 0
+    # Confabs published to the same directory would overwrite each other
+    directories = {}
+    
+    async def insert_pending():
+        db.add_all(pending)
+        await db.flush()
+        confab_ids.extend(db_confab.id for db_confab in pending)
+        pending.clear()
+    
+    async def enqueue_committed():
+        # Use a fresh session; the request's may be mid-transaction
+        async with open_session() as session:
+            await publish_queue.enqueue_bulk(session, current_user.id, confab_ids)
+            await session.commit()
+        publish_queue.notify()
+    
+    try:
+        async for line_number, line in _ndjson_lines(request):
+            if len(confab_ids) + len(pending) + len(errors) >= CONFAB_BULK_MAX_ITEMS:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"At most {CONFAB_BULK_MAX_ITEMS} confabs per request"
+                )
+            try:
+                confab = ConfabCreate.model_validate_json(line)
+            except ValidationError as e:
+                errors.append({"line": line_number, "detail": jsonable_encoder(e.errors(include_url=False))})
+                continue
+            
+            directory = confab_manager.confab_dir(confab.name)
+            if directory in directories:
+                errors.append({"line": line_number, "detail": [{
+                    "type": "duplicate_name",
+                    "loc": ["name"],
+                    "msg": f"Line {directories[directory]} is also published to {directory}/",
+                    "input": confab.name
+                }]})
+                continue
+            directories[directory] = line_number
+            
+            pending.append(Confab(
+                name=confab.name,
+                description=confab.description,
+                config=confab.config.model_dump(mode="json") if confab.config else None,
+                user_id=current_user.id,
+                version="1.0.0",
+                status="draft"
+            ))
+            if len(pending) >= CONFAB_BULK_BATCH_SIZE:
+                await insert_pending()
+                await db.commit()
+                committed = len(confab_ids)
         
-        db_confab.github_url = github_url
-        db.commit()
+        if pending:
+            await insert_pending()
+    except asyncio.CancelledError:
+        # Still publish the batches already committed; shielded so the
+        # enqueue completes while this task unwinds
+        del confab_ids[committed:]
+        if confab_ids:
+            await asyncio.shield(enqueue_committed())
+        confab_cache.invalidate(current_user.id)
+        raise
     except Exception as e:
-        # If GitHub creation fails, we still have the confab in DB
-        pass
-    
-    return ConfabResponse(
-        id=db_confab.id,
-        name=db_confab.name,
-        description=db_confab.description,
-        version=db_confab.version,
-        status=db_confab.status,
-        github_url=db_confab.github_url,
-        created_at=db_confab.created_at,
-        updated_at=db_confab.updated_at
-    )
+        # Keep the batches already committed and still publish them
+        await db.rollback()
+        del confab_ids[committed:]
+        job = None
+        if confab_ids:
+            job = await publish_queue.enqueue_bulk(db, current_user.id, confab_ids)
+            await db.commit()
+            publish_queue.notify()
+        confab_cache.invalidate(current_user.id)
+        if isinstance(e, HTTPException) and confab_ids:
+            # Tell the client which confabs were created before the import stopped
+            raise HTTPException(status_code=e.status_code, detail={
+                "message": e.detail,
+                **ConfabBulkResult(
+                    created=len(confab_ids),
+                    confab_ids=confab_ids,
+                    errors=errors,
+                    publish_job_id=job.id
+                ).model_dump()
+            }) from e
+        raise
+    
+    # Publish the whole import as a single branch, commit and pull request
+    job = None
+    if confab_ids:
+        job = await publish_queue.enqueue_bulk(db, current_user.id, confab_ids)
+    await db.commit()
+    confab_cache.invalidate(current_user.id)
+    if job:
+        publish_queue.notify()
+    
+    return ModelResponse(ConfabBulkResult(
+        created=len(confab_ids),
+        confab_ids=confab_ids,
+        errors=errors,
+        publish_job_id=job.id if job else None
+    ), status_code=status.HTTP_202_ACCEPTED)
 
-@app.get("/confabs", response_model=list[ConfabResponse])
-async def get_user_confabs(
+@app.get("/confabs/export")
+async def export_confabs(
+    format: str = Query(default="ndjson", pattern="^(ndjson|tar)$"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    confabs = db.query(Confab).filter(Confab.user_id == current_user.id).all()
-    return [
-        ConfabResponse(
-            id=confab.id,
-            name=confab.name,
-            description=confab.description,
-            version=confab.version,
-            status=confab.status,
-            github_url=confab.github_url,
-            created_at=confab.created_at,
-            updated_at=confab.updated_at
+    columns = [*CONFAB_LIST_COLUMNS.values(), Confab.config]
+    
+    if format == "ndjson":
+        # One confab per line; the output can be fed back to POST /confabs/bulk
+        async def ndjson_lines():
+            async for row in _iter_confab_rows(db, current_user.id, columns):
+                yield json.dumps(jsonable_encoder(dict(row._mapping))) + "\n"
+        
+        return StreamingResponse(
+            ndjson_lines(),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="confabs.ndjson"'}
         )
-        for confab in confabs
-    ]
+    
+    # The files each confab is published as, in the repository layout
+    async def tar_chunks():
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w|gz") as tar:
+            async for row in _iter_confab_rows(db, current_user.id, columns):
+                files = confab_manager.render_confab_files(row.name, confab_template_data(row))
+                mtime = (row.updated_at or row.created_at).timestamp()
+                for path, content in files.items():
+                    data = content.encode()
+                    info = tarfile.TarInfo(path)
+                    info.size = len(data)
+                    info.mtime = mtime
+                    tar.addfile(info, io.BytesIO(data))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    return StreamingResponse(
+        tar_chunks(),
+        media_type="application/gzip",
+        headers={"Content-Disposition": 'attachment; filename="confabs.tar.gz"'}
+    )
 
 @app.get("/confabs/{confab_id}", response_model=ConfabResponse)
 async def get_confab(
     confab_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    confab = db.query(Confab).filter(
+    cache_key = request.url.path
+    cached = confab_cache.get(current_user.id, cache_key)
+    if cached is not None:
+        return _confab_read_response(request, cached)
+    generation = confab_cache.generation
+    
+    confab = await db.scalar(select(Confab).where(
         Confab.id == confab_id,
         Confab.user_id == current_user.id
-    ).first()
+    ))
     
     if not confab:
         raise HTTPException(
@@ -348,28 +1007,36 @@ async def get_confab(
             detail="Confab not found"
         )
     
-    return ConfabResponse(
-        id=confab.id,
-        name=confab.name,
-        description=confab.description,
-        version=confab.version,
-        status=confab.status,
-        github_url=confab.github_url,
-        created_at=confab.created_at,
-        updated_at=confab.updated_at
+    # Covers every field in the body, so edits that skip the version bump
+    # still change the tag
+    etag = _etag(
+        confab.id, confab.name, confab.description, confab.version, confab.status,
+        json.dumps(confab.config, sort_keys=True, default=str),
+        confab.github_url, confab.created_at, confab.updated_at
     )
+    if _etag_matches(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+        )
+    
+    body = confab_adapter.dump_json(ConfabResponse.model_validate(confab))
+    
+    cached = CachedResponse(etag, body, {})
+    confab_cache.set(current_user.id, cache_key, cached, generation)
+    return _confab_read_response(request, cached)
 
-@app.put("/confabs/{confab_id}", response_model=ConfabResponse)
+@app.put("/confabs/{confab_id}", response_model=ConfabResponse, status_code=status.HTTP_202_ACCEPTED)
 async def update_confab(
     confab_id: int,
     confab_update: ConfabCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    confab = db.query(Confab).filter(
+    confab = await db.scalar(select(Confab).where(
         Confab.id == confab_id,
         Confab.user_id == current_user.id
-    ).first()
+    ))
     
     if not confab:
         raise HTTPException(
@@ -377,49 +1044,43 @@ async def update_confab(
             detail="Confab not found"
         )
     
-    # Update confab in database
-    confab.name = confab_update.name
-    confab.description = confab_update.description
-    confab.version = str(float(confab.version) + 0.1)  # Increment version
-    db.commit()
-    
-    # Update confab in GitHub
-    if confab.github_url:
-        github_account = db.query(GitHubAccount).filter(GitHubAccount.user_id == current_user.id).first()
-        if github_account:
-            try:
-                await update_confab_in_github(
-                    confab_name=confab.name,
-                    confab_data=confab_update.dict(),
-                    github_url=confab.github_url,
-                    access_token=github_account.access_token
-                )
-            except Exception as e:
-                pass  # Log error but don't fail the update
+    config = confab.config
+    if "config" in confab_update.model_fields_set:
+        config = confab_update.config.model_dump(mode="json") if confab_update.config else None
     
-    db.refresh(confab)
+    # A PUT that changes nothing keeps its version and publishes nothing
+    job = None
+    if (confab_update.name, confab_update.description, config) != (confab.name, confab.description, confab.config):
+        # Update confab in database
+        confab.name = confab_update.name
+        confab.description = confab_update.description
+        confab.config = config
+        confab.version = _bump_version(confab.version)
+        
+        # Publish to GitHub in the background
+        if current_user.github_account:
+            job = await publish_queue.enqueue(db, confab, "update", confab_update.model_dump(mode="json"))
+        
+        await db.commit()
+        confab_cache.invalidate(current_user.id)
+        await db.refresh(confab)
+        if job:
+            publish_queue.notify()
     
-    return ConfabResponse(
-        id=confab.id,
-        name=confab.name,
-        description=confab.description,
-        version=confab.version,
-        status=confab.status,
-        github_url=confab.github_url,
-        created_at=confab.created_at,
-        updated_at=confab.updated_at
-    )
+    confab_response = ConfabResponse.model_validate(confab)
+    confab_response.publish_job_id = job.id if job else None
+    return ModelResponse(confab_response, status_code=status.HTTP_202_ACCEPTED)
 
 @app.delete("/confabs/{confab_id}")
 async def delete_confab(
     confab_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    confab = db.query(Confab).filter(
+    confab = await db.scalar(select(Confab).where(
         Confab.id == confab_id,
         Confab.user_id == current_user.id
-    ).first()
+    ))
     
     if not confab:
         raise HTTPException(
@@ -427,11 +1088,32 @@ async def delete_confab(
             detail="Confab not found"
         )
     
-    db.delete(confab)
-    db.commit()
+    await publish_queue.detach_confab(db, confab)
+    await db.delete(confab)
+    await db.commit()
+    confab_cache.invalidate(current_user.id)
     
     return {"message": "Confab deleted successfully"}
 
+@app.get("/jobs/{job_id}", response_model=PublishJobResponse)
+async def get_publish_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    job = await db.scalar(select(PublishJob).where(
+        PublishJob.id == job_id,
+        PublishJob.user_id == current_user.id
+    ))
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Publish job not found"
+        )
+    
+    return ModelResponse(PublishJobResponse.model_validate(job))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,328 @@
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+import os
+
+from sqlalchemy import event
+
+from profiling import slow_request_sampler
+
+load_dotenv()
+
+# Bearer token required to scrape /metrics; unauthenticated when unset or empty
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in values:
+            labels = self._labels(key)
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(float(bound))}, count
+            yield f"{self.name}_count", labels, state[-2]
+            yield f"{self.name}_sum", labels, state[-1]
+
+
+class CallbackGauge(Metric):
+    """A gauge (or counter) whose samples are read from live state at scrape time."""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Iterable[Tuple[Dict[str, str], float]]], kind: str = "gauge"):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self._read = read
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self._read():
+            yield self.name, labels, value
+
+
+class MetricsRegistry:
+    """Metric families rendered in the Prometheus text exposition format.
+
+    Values live in this process; with several uvicorn workers each one
+    reports its own and Prometheus scrapes them as separate targets.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, read, kind: str = "gauge") -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, read, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+metrics_registry = MetricsRegistry()
+
+# HTTP
+http_requests = metrics_registry.counter(
+    "http_requests_total", "HTTP requests handled, by route template and status.", ("method", "route", "status")
+)
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+http_requests_in_flight = metrics_registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("method",)
+)
+
+# Database
+db_query_duration = metrics_registry.histogram(
+    "db_query_duration_seconds", "SQL statement latency by engine, operation and table.",
+    ("engine", "operation", "table"), DB_BUCKETS
+)
+db_query_errors = metrics_registry.counter(
+    "db_query_errors_total", "SQL statements that raised, by engine, operation and table.", ("engine", "operation", "table")
+)
+
+# GitHub
+github_requests = metrics_registry.counter(
+    "github_requests_total", "GitHub API requests sent, by endpoint template and status.", ("method", "endpoint", "status")
+)
+github_request_duration = metrics_registry.histogram(
+    "github_request_duration_seconds", "GitHub API request latency by endpoint template.", ("method", "endpoint")
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that times every HTTP request by its route template.
+
+    The template (e.g. ``/confabs/{confab_id}``) is read from the matched
+    route after the app has run, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(method=method)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_requests.inc(method=method, route=route, status=str(status_code))
+            http_request_duration.observe(elapsed, method=method, route=route)
+
+
+_STATEMENT_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN|TABLE)\s+"?(\w+)"?', re.IGNORECASE)
+
+
+def statement_labels(statement: str) -> Tuple[str, str]:
+    """Operation keyword and first table of a SQL statement."""
+    words = statement.lstrip("( \n").split(None, 1)
+    operation = words[0].upper() if words else "UNKNOWN"
+    match = _STATEMENT_TABLE.search(statement)
+    return operation, match.group(1).lower() if match else "none"
+
+
+def instrument_engine(sync_engine, name: str) -> None:
+    """Time every statement an engine executes (also the sync engine behind an async one)."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        operation, table = statement_labels(statement)
+        db_query_duration.observe(elapsed, engine=name, operation=operation, table=table)
+        slow_request_sampler.record_query(statement, elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+        operation, table = statement_labels(exception_context.statement or "")
+        db_query_errors.inc(engine=name, operation=operation, table=table)
+
+
+_GITHUB_ENDPOINTS = [
+    (re.compile(pattern + "$"), template)
+    for pattern, template in [
+        (r"/repos/[^/]+/[^/]+", "/repos/{owner}/{repo}"),
+        (r"/repos/[^/]+/[^/]+/git/ref/heads/.+", "/repos/{owner}/{repo}/git/ref/heads/{branch}"),
+        (r"/repos/[^/]+/[^/]+/git/refs/heads/.+", "/repos/{owner}/{repo}/git/refs/heads/{branch}"),
+        (r"/repos/[^/]+/[^/]+/git/(refs|commits|blobs|trees)", r"/repos/{owner}/{repo}/git/\1"),
+        (r"/repos/[^/]+/[^/]+/git/(commits|blobs|trees)/[^/]+", r"/repos/{owner}/{repo}/git/\1/{sha}"),
+        (r"/repos/[^/]+/[^/]+/contents(/.*)?", "/repos/{owner}/{repo}/contents/{path}"),
+        (r"/repos/[^/]+/[^/]+/pulls", "/repos/{owner}/{repo}/pulls"),
+        (r"/repos/[^/]+/[^/]+/pulls/\d+", "/repos/{owner}/{repo}/pulls/{number}"),
+        (r"/orgs/[^/]+/repos", "/orgs/{org}/repos"),
+        (r"/(user|user/emails|user/orgs|user/repos|rate_limit|login/oauth/access_token)", r"/\1"),
+    ]
+]
+
+
+def github_endpoint(path: str) -> str:
+    """Endpoint template for a GitHub API path, with owner, repo, SHAs etc. elided."""
+    for pattern, template in _GITHUB_ENDPOINTS:
+        match = pattern.match(path)
+        if match:
+            return match.expand(template)
+    return "other"
+
+
+def record_github_request(method: str, path: str, status: str, seconds: float) -> None:
+    endpoint = github_endpoint(path)
+    github_requests.inc(method=method, endpoint=endpoint, status=status)
+    github_request_duration.observe(seconds, method=method, endpoint=endpoint)
+    slow_request_sampler.record_github_call(method, endpoint, status, seconds)
+
+
+def metrics_authorized(authorization: Optional[str]) -> bool:
+    return METRICS_TOKEN is None or authorization == f"Bearer {METRICS_TOKEN}"
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, JSON, Index, DDL, event, literal_column
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -43,11 +44,74 @@ class Confab(Base):
     description = Column(Text, nullable=True)
     version = Column(String(50), nullable=False, default="1.0.0")
     status = Column(String(50), nullable=False, default="draft")  # draft, published, archived
-    config = Column(JSON, nullable=True)  # Store confab configuration as JSON
+    config = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)  # Store confab configuration as JSON (JSONB on Postgres)
     github_url = Column(String(500), nullable=True)  # URL to GitHub repo/files
+    published_files = Column(JSON, nullable=True)  # File path -> git blob SHA as last published
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="confabs")
+
+    __table_args__ = (
+        # GET /confabs: filter by owner, keyset-ordered by (created_at, id)
+        Index("ix_confabs_user_id_created_at_id", "user_id", "created_at", "id"),
+        # GET /confabs?status=...: same ordering within one status
+        Index("ix_confabs_user_id_status_created_at_id", "user_id", "status", "created_at", "id"),
+        # Config containment queries (config @> '{...}'); Postgres only
+        Index(
+            "ix_confabs_config",
+            "config",
+            postgresql_using="gin",
+            postgresql_ops={"config": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
+# Full-text search document for confabs: name, description (which PURPOSE.md
+# is written from) and the system prompt of either config shape, weighted in
+# that order. Postgres keeps it in a stored generated column, so every write
+# path updates it; the column is not mapped and does not exist elsewhere.
+CONFAB_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce("
+    "config -> 'conversation' ->> 'system_prompt', config ->> 'system_prompt', '')), 'C')"
+)
+confab_search_vector = literal_column("confabs.search_vector")
+
+event.listen(
+    Confab.__table__,
+    "after_create",
+    DDL(
+        f"ALTER TABLE confabs ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({CONFAB_SEARCH_DOCUMENT}) STORED"
+    ).execute_if(dialect="postgresql")
+)
+event.listen(
+    Confab.__table__,
+    "after_create",
+    DDL("CREATE INDEX ix_confabs_search_vector ON confabs USING gin (search_vector)").execute_if(dialect="postgresql")
+)
+
+class PublishJob(Base):
+    __tablename__ = "publish_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    confab_id = Column(Integer, ForeignKey("confabs.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    action = Column(String(50), nullable=False)  # create, update, bulk_create
+    status = Column(String(50), nullable=False, default="queued")  # queued, running, succeeded, failed
+    payload = Column(JSON, nullable=True)  # Confab data to publish
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text, nullable=True)
+    result_url = Column(String(500), nullable=True)  # URL of the resulting PR
+    run_after = Column(DateTime(timezone=True), server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_publish_jobs_status_run_after", "status", "run_after"),
+    )
@@ -0,0 +1,304 @@
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# On-demand profiling
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_DEFAULT_INTERVAL = float(os.getenv("PROFILE_DEFAULT_INTERVAL", "0.005"))
+
+# Slow-request sampler: requests slower than the threshold keep their stack
+# samples, SQL and GitHub calls; 0 turns the sampler off
+SLOW_REQUEST_THRESHOLD = float(os.getenv("SLOW_REQUEST_THRESHOLD", "1.0"))
+SLOW_REQUEST_SAMPLE_INTERVAL = float(os.getenv("SLOW_REQUEST_SAMPLE_INTERVAL", "0.01"))
+SLOW_REQUEST_LOG_SIZE = int(os.getenv("SLOW_REQUEST_LOG_SIZE", "50"))
+SLOW_REQUEST_MAX_SAMPLES = int(os.getenv("SLOW_REQUEST_MAX_SAMPLES", "2000"))
+
+# Innermost Python frames of a thread that is waiting rather than working
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES
+
+
+def collapse_stack(frame) -> str:
+    """A frame and its callers as one collapsed-stack line (outermost first)."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def format_collapsed(stacks: Dict[str, int]) -> str:
+    """Collapsed stacks as read by flamegraph.pl, speedscope and inferno."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+
+_profile_lock = threading.Lock()
+
+
+def profile_process(seconds: float, interval: float = PROFILE_DEFAULT_INTERVAL, include_idle: bool = False) -> Dict[str, int]:
+    """Sample every thread's stack for a while; returns collapsed stacks and counts.
+
+    Runs in the calling thread (use a worker thread from async code) and
+    raises RuntimeError if another profile is already running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        me = threading.get_ident()
+        names = {}
+        stacks: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me or (not include_idle and _is_idle(frame)):
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stacks[f"{names.get(thread_id, thread_id)};{collapse_stack(frame)}"] += 1
+            time.sleep(interval)
+        return dict(stacks)
+    finally:
+        _profile_lock.release()
+
+
+class RequestProfile:
+    """What one in-flight request spent its time on."""
+
+    def __init__(self, method: str, path: str, frame_id: int, thread_id: int):
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.frame_id = frame_id
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.queries: Dict[str, List[float]] = {}
+        self.github_calls: List[Dict[str, Any]] = []
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        entry = self.queries.setdefault(statement, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def record_github_call(self, method: str, endpoint: str, status: str, seconds: float) -> None:
+        self.github_calls.append({
+            "method": method,
+            "endpoint": endpoint,
+            "status": status,
+            "ms": round(seconds * 1000, 3),
+        })
+
+    def to_dict(self, top_stacks: int = 20) -> Dict[str, Any]:
+        queries = sorted(self.queries.items(), key=lambda item: -item[1][1])
+        return {
+            "method": self.method,
+            "route": self.route or self.path,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "sql": {
+                "count": sum(int(count) for count, _ in self.queries.values()),
+                "ms": round(sum(seconds for _, seconds in self.queries.values()) * 1000, 3),
+                "statements": [
+                    {"statement": statement, "count": int(count), "ms": round(seconds * 1000, 3)}
+                    for statement, (count, seconds) in queries[:20]
+                ],
+            },
+            "github": {
+                "count": len(self.github_calls),
+                "ms": round(sum(call["ms"] for call in self.github_calls), 3),
+                "calls": self.github_calls[:50],
+            },
+            # Event-loop samples taken while this request's code was running
+            "loop_samples": self.samples,
+            "stacks": dict(self.stacks.most_common(top_stacks)),
+        }
+
+
+class SlowRequestSampler:
+    """Always-on sampler that keeps a profile of every request over a threshold.
+
+    While requests are in flight a background thread samples the event-loop
+    thread's stack and credits each sample to the request whose middleware
+    frame is on it, so a request that blocks the loop is the one charged.
+    SQL statements and GitHub calls are recorded through a context variable
+    (time spent in worker threads shows up there rather than in samples).
+    Finished requests slower than the threshold are kept in a ring buffer.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SLOW_REQUEST_THRESHOLD,
+        interval: float = SLOW_REQUEST_SAMPLE_INTERVAL,
+        log_size: int = SLOW_REQUEST_LOG_SIZE
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=log_size)
+        self.slow_total = 0
+        self._active: Dict[int, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._current: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+            "request_profile", default=None
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="slow-request-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def begin(self, method: str, path: str, frame) -> Optional[RequestProfile]:
+        if not self.enabled:
+            return None
+        profile = RequestProfile(method, path, id(frame), threading.get_ident())
+        with self._lock:
+            self._active[profile.frame_id] = profile
+        self._current.set(profile)
+        self._wakeup.set()
+        return profile
+
+    def finish(self, profile: Optional[RequestProfile]) -> None:
+        if profile is None:
+            return
+        profile.duration = time.perf_counter() - profile.start
+        with self._lock:
+            self._active.pop(profile.frame_id, None)
+        if profile.duration >= self.threshold:
+            self.slow_total += 1
+            record = profile.to_dict()
+            self.recent.append(record)
+            logger.warning(
+                "Slow request %s %s took %.0f ms (%d SQL, %.0f ms; %d GitHub, %.0f ms)",
+                record["method"], record["route"], record["duration_ms"],
+                record["sql"]["count"], record["sql"]["ms"], record["github"]["count"], record["github"]["ms"]
+            )
+
+    def current(self) -> Optional[RequestProfile]:
+        return self._current.get()
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        profile = self._current.get()
+        if profile is not None:
+            profile.record_query(statement, seconds)
+
+    def record_github_call(self, method: str, endpoint: str, status: str, seconds: float) -> None:
+        profile = self._current.get()
+        if profile is not None:
+            profile.record_github_call(method, endpoint, status, seconds)
+
+    def _sample(self) -> None:
+        with self._lock:
+            active = list(self._active.values())
+        frames = sys._current_frames()
+        for thread_id in {profile.thread_id for profile in active}:
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            on_stack: Set[int] = set()
+            walker = frame
+            while walker is not None:
+                on_stack.add(id(walker))
+                walker = walker.f_back
+            owners = [p for p in active if p.thread_id == thread_id and p.frame_id in on_stack]
+            if not owners:
+                continue
+            stack = collapse_stack(frame)
+            for profile in owners:
+                if profile.samples < SLOW_REQUEST_MAX_SAMPLES:
+                    profile.stacks[stack] += 1
+                    profile.samples += 1
+
+    def _run(self) -> None:
+        while not self._stopping:
+            if not self._active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            self._sample()
+            time.sleep(self.interval)
+
+    def snapshot(self, limit: int = 50) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "in_flight": len(self._active),
+            "slow_total": self.slow_total,
+            "requests": list(self.recent)[-limit:][::-1],
+        }
+
+
+# Global instance
+slow_request_sampler = SlowRequestSampler()
+
+
+class SlowRequestMiddleware:
+    """ASGI middleware that profiles each request for the slow-request sampler."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # /admin/profile runs for as long as it samples; don't log it as slow
+        if scope["type"] != "http" or not slow_request_sampler.enabled or scope["path"].startswith("/admin/"):
+            await self.app(scope, receive, send)
+            return
+
+        profile = slow_request_sampler.begin(scope["method"], scope["path"], sys._getframe())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.route = getattr(scope.get("route"), "path", None)
+            slow_request_sampler.finish(profile)
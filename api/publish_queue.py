@@ -0,0 +1,461 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+import os
+
+from sqlalchemy import or_, and_, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from database import SessionLocal
+from confab_cache import confab_cache
+from models import Confab, GitHubAccount, PublishJob
+from confab_templates import confab_template_data
+from confab_manager import create_confab_in_github, create_confabs_in_github, update_confab_in_github
+from github_rate_limit import GitHubRateLimitError
+from tracing import tracer
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Worker pool configuration
+PUBLISH_WORKERS = int(os.getenv("PUBLISH_WORKERS", "4"))
+PUBLISH_MAX_ATTEMPTS = int(os.getenv("PUBLISH_MAX_ATTEMPTS", "5"))
+PUBLISH_RETRY_BASE_DELAY = float(os.getenv("PUBLISH_RETRY_BASE_DELAY", "2"))
+PUBLISH_POLL_INTERVAL = float(os.getenv("PUBLISH_POLL_INTERVAL", "5"))
+PUBLISH_JOB_LEASE = float(os.getenv("PUBLISH_JOB_LEASE", "300"))
+# Updates wait this long for further edits to the same confab before publishing
+PUBLISH_DEBOUNCE = float(os.getenv("PUBLISH_DEBOUNCE", "2"))
+
+# Default Confab Repository
+DEFAULT_CONFAB_REPO_OWNER = os.getenv("DEFAULT_CONFAB_REPO_OWNER", "letsconfab")
+DEFAULT_CONFAB_REPO_NAME = os.getenv("DEFAULT_CONFAB_REPO_NAME", "confabs")
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+class PublishQueue:
+    """Postgres-backed queue of GitHub publish jobs drained by a worker pool.
+
+    Endpoints enqueue a job in the same transaction that persists the confab
+    and return immediately; workers claim jobs with ``FOR UPDATE SKIP LOCKED``
+    and a compare-and-set lease token, so several API processes can share one
+    queue and a job is only ever finished by the worker that holds it. Jobs
+    for the same confab run strictly in order, failures are retried with
+    exponential backoff (jobs hitting GitHub's rate limit wait for its reset
+    instead), and jobs left running by a crashed process are reclaimed once
+    their lease expires. Updates are debounced and coalesce into a job already
+    queued for the same confab, so a burst of edits costs one publish of the
+    latest state.
+    """
+
+    def __init__(self, workers: int = PUBLISH_WORKERS):
+        self.workers = workers
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        confab: Confab,
+        action: str,
+        payload: Dict[str, Any]
+    ) -> PublishJob:
+        """Add a publish job to the session; the caller commits and calls notify().
+        
+        The current trace context is stored with the job, so the publish shows
+        up in the trace of the request that queued it.
+        
+        An update joins any job still queued for the confab instead of adding
+        another: jobs render the stored confab when they run, so the pending
+        one already publishes the latest state. Its start is pushed back by
+        PUBLISH_DEBOUNCE to absorb further edits.
+        """
+        payload = _with_traceparent(payload)
+        
+        run_after = datetime.now(timezone.utc)
+        if action == "update":
+            run_after += timedelta(seconds=PUBLISH_DEBOUNCE)
+            # Skip a job a worker is claiming right now; it then gets a successor
+            pending = await db.scalar(
+                select(PublishJob)
+                .where(PublishJob.confab_id == confab.id, PublishJob.status == "queued")
+                .order_by(PublishJob.id.desc())
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            if pending is not None:
+                # Never pull a retry forward past its backoff
+                if pending.run_after is not None and _as_utc(pending.run_after) > run_after:
+                    run_after = pending.run_after
+                values = {"run_after": run_after}
+                if pending.action == "update":
+                    values["payload"] = payload
+                # Only join it while it is still queued (no row locks on SQLite)
+                joined = await db.execute(
+                    update(PublishJob)
+                    .where(PublishJob.id == pending.id, PublishJob.status == "queued")
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if joined.rowcount:
+                    return pending
+
+        job = PublishJob(
+            confab_id=confab.id,
+            user_id=confab.user_id,
+            action=action,
+            status="queued",
+            payload=payload,
+            attempts=0,
+            max_attempts=PUBLISH_MAX_ATTEMPTS,
+            run_after=run_after,
+        )
+        db.add(job)
+        await db.flush()
+        return job
+
+    async def enqueue_bulk(self, db: AsyncSession, user_id: int, confab_ids: List[int]) -> PublishJob:
+        """Add one job publishing a bulk import; it hangs off the batch's first confab."""
+        job = PublishJob(
+            confab_id=confab_ids[0],
+            user_id=user_id,
+            action="bulk_create",
+            status="queued",
+            payload=_with_traceparent({"confab_ids": confab_ids}),
+            attempts=0,
+            max_attempts=PUBLISH_MAX_ATTEMPTS,
+        )
+        db.add(job)
+        await db.flush()
+        return job
+
+    async def detach_confab(self, db: AsyncSession, confab: Confab) -> None:
+        """Before deleting a confab, hand the bulk jobs anchored on it to another confab of their batch.
+
+        A bulk import's job hangs off its first confab, and deleting that
+        confab would delete the job along with it.
+        """
+        jobs = await db.scalars(
+            select(PublishJob)
+            .where(
+                PublishJob.confab_id == confab.id,
+                PublishJob.action == "bulk_create",
+                PublishJob.status.in_(ACTIVE_JOB_STATUSES)
+            )
+        )
+        for job in jobs.all():
+            anchor = await db.scalar(
+                select(Confab.id)
+                .where(
+                    Confab.id.in_(job.payload["confab_ids"]),
+                    Confab.id != confab.id,
+                    Confab.user_id == job.user_id
+                )
+                .order_by(Confab.id)
+                .limit(1)
+            )
+            if anchor is not None:
+                job.confab_id = anchor
+        await db.flush()
+
+    def notify(self) -> None:
+        """Wake idle workers so a freshly committed job is picked up immediately."""
+        self._wakeup.set()
+        if PUBLISH_DEBOUNCE > 0:
+            # And again once a debounced update becomes due
+            asyncio.get_running_loop().call_later(PUBLISH_DEBOUNCE, self._wakeup.set)
+
+    async def start(self) -> None:
+        self._stopping = False
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(i)))
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, worker_id: int) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                claim = await asyncio.to_thread(self._claim_next)
+            except Exception:
+                logger.exception("Publish worker %s failed to claim a job", worker_id)
+                claim = None
+
+            if claim is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=PUBLISH_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(*claim)
+
+    def _claim_next(self) -> Optional[Tuple[int, datetime]]:
+        """Move the next runnable job to 'running'; returns its id and lease token.
+
+        The claim is a compare-and-set on the status (and, for an expired
+        lease, the old ``locked_at``), so two workers that pick the same job
+        cannot both run it, even without row locks as on SQLite. The new
+        ``locked_at`` is the lease token that _finish and _fail must present.
+        """
+        now = datetime.now(timezone.utc)
+        earlier = aliased(PublishJob)
+        db = SessionLocal()
+        try:
+            runnable = or_(
+                and_(PublishJob.status == "queued", PublishJob.run_after <= now),
+                and_(
+                    PublishJob.status == "running",
+                    PublishJob.locked_at < now - timedelta(seconds=PUBLISH_JOB_LEASE)
+                ),
+            )
+            # Serialize jobs per confab: skip any job with an unfinished predecessor
+            blocked = exists().where(
+                earlier.confab_id == PublishJob.confab_id,
+                earlier.id < PublishJob.id,
+                earlier.status.in_(ACTIVE_JOB_STATUSES),
+            )
+            candidates = (
+                db.query(PublishJob.id, PublishJob.status, PublishJob.locked_at)
+                .filter(runnable, ~blocked)
+                .order_by(PublishJob.id)
+                .limit(self.workers + 1)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for job_id, status, locked_at in candidates:
+                claimed = (
+                    db.query(PublishJob)
+                    .filter(
+                        PublishJob.id == job_id,
+                        PublishJob.status == status,
+                        PublishJob.locked_at.is_(None) if locked_at is None else PublishJob.locked_at == locked_at,
+                    )
+                    .update(
+                        {"status": "running", "locked_at": now, "attempts": PublishJob.attempts + 1},
+                        synchronize_session=False
+                    )
+                )
+                if claimed:
+                    db.commit()
+                    return job_id, now
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    async def _run(self, job_id: int, token: datetime) -> None:
+        try:
+            target = await asyncio.to_thread(self._load_target, job_id)
+            if target is None:
+                await asyncio.to_thread(self._finish, job_id, token, None, {})
+                return
+
+            with tracer.span(
+                f"publish {target['action']}",
+                attributes={"publish.job_id": job_id},
+                traceparent=target["traceparent"]
+            ):
+                result, published_files = await self._publish(target)
+        except asyncio.CancelledError:
+            # Leave the job running; its lease expires and another worker retries it
+            raise
+        except GitHubRateLimitError as e:
+            logger.warning("Publish job %s deferred: %s", job_id, e)
+            await asyncio.to_thread(self._defer, job_id, token, e)
+            return
+        except Exception as e:
+            logger.warning("Publish job %s failed: %s", job_id, e)
+            await asyncio.to_thread(self._fail, job_id, token, str(e))
+            return
+
+        await asyncio.to_thread(self._finish, job_id, token, result["html_url"], published_files)
+
+    async def _publish(self, target: Dict[str, Any]):
+        """Run a job against GitHub; returns the result and each confab's published file SHAs."""
+        if target["action"] == "bulk_create":
+            result = await create_confabs_in_github(
+                confabs=target["confabs"],
+                repo_owner=target["repo_owner"],
+                repo_name=target["repo_name"],
+                access_token=target["access_token"]
+            )
+            published_files = dict(zip(target["confab_ids"], result["files"]))
+        elif target["action"] == "create":
+            result = await create_confab_in_github(
+                confab_name=target["confab_name"],
+                confab_data=target["confab_data"],
+                repo_owner=target["repo_owner"],
+                repo_name=target["repo_name"],
+                access_token=target["access_token"]
+            )
+            published_files = {target["confab_id"]: result["files"]}
+        else:
+            result = await update_confab_in_github(
+                confab_name=target["confab_name"],
+                confab_data=target["confab_data"],
+                github_url=target["github_url"],
+                access_token=target["access_token"],
+                published_files=target["published_files"]
+            )
+            published_files = {target["confab_id"]: result["files"]}
+        return result, published_files
+
+    def _load_target(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Resolve everything a job needs from the database, or None if there is nothing to do."""
+        db = SessionLocal()
+        try:
+            job = db.query(PublishJob).filter(PublishJob.id == job_id).first()
+            if job is None:
+                return None
+
+            github_account = db.query(GitHubAccount).filter(GitHubAccount.user_id == job.user_id).first()
+            target = {
+                "action": job.action,
+                "traceparent": (job.payload or {}).get("traceparent"),
+                "access_token": github_account.access_token if github_account else None,
+            }
+
+            # Render from the stored confabs, not the request payload, so
+            # unchanged confabs produce identical files
+            if job.action == "bulk_create":
+                # Publish whichever confabs of the batch still exist
+                confabs = (
+                    db.query(Confab)
+                    .filter(Confab.id.in_(job.payload["confab_ids"]), Confab.user_id == job.user_id)
+                    .order_by(Confab.id)
+                    .all()
+                )
+                if not confabs:
+                    return None
+                target["confabs"] = [(c.name, confab_template_data(c)) for c in confabs]
+                target["confab_ids"] = [c.id for c in confabs]
+            else:
+                confab = db.query(Confab).filter(Confab.id == job.confab_id).first()
+                if confab is None:
+                    return None
+                target.update({
+                    "confab_data": confab_template_data(confab),
+                    "confab_id": confab.id,
+                    "confab_name": confab.name,
+                    "github_url": confab.github_url,
+                    "published_files": confab.published_files,
+                })
+
+            if job.action in ("create", "bulk_create"):
+                if github_account:
+                    # Use user's connected repo
+                    target["repo_owner"] = github_account.selected_org or github_account.github_username
+                    target["repo_name"] = github_account.selected_repo
+                else:
+                    # Use default confabs repo
+                    target["repo_owner"] = DEFAULT_CONFAB_REPO_OWNER
+                    target["repo_name"] = DEFAULT_CONFAB_REPO_NAME
+            elif not confab.github_url or not github_account:
+                # Nothing published yet or no token to update with
+                return None
+
+            return target
+        finally:
+            db.close()
+
+    def _finish(
+        self,
+        job_id: int,
+        token: datetime,
+        url: Optional[str],
+        published_files: Dict[int, Dict[str, str]]
+    ) -> None:
+        """Mark a job succeeded and record what each confab now looks like on GitHub."""
+        db = SessionLocal()
+        try:
+            values = {"status": "succeeded", "last_error": None, "locked_at": None}
+            if url:
+                values["result_url"] = url
+            if not self._release(db, job_id, token, values):
+                return
+            confabs = db.query(Confab).filter(Confab.id.in_(published_files)).all() if published_files else []
+            for confab in confabs:
+                confab.published_files = published_files[confab.id]
+                if url:
+                    # Updates may open a new PR once the previous one is closed
+                    confab.github_url = url
+            user_id = db.query(PublishJob.user_id).filter(PublishJob.id == job_id).scalar()
+            db.commit()
+            # github_url may have changed under cached confab reads
+            confab_cache.invalidate(user_id)
+        finally:
+            db.close()
+
+    def _fail(self, job_id: int, token: datetime, error: str) -> None:
+        db = SessionLocal()
+        try:
+            job = db.query(PublishJob).filter(PublishJob.id == job_id).first()
+            if job is None:
+                return
+            values = {"last_error": error, "locked_at": None}
+            if job.attempts >= job.max_attempts:
+                values["status"] = "failed"
+            else:
+                delay = PUBLISH_RETRY_BASE_DELAY * (2 ** (job.attempts - 1))
+                values["status"] = "queued"
+                values["run_after"] = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            if self._release(db, job_id, token, values):
+                db.commit()
+        finally:
+            db.close()
+
+    def _defer(self, job_id: int, token: datetime, error: GitHubRateLimitError) -> None:
+        """Requeue a rate-limited job for when GitHub's budget resets, without spending an attempt."""
+        db = SessionLocal()
+        try:
+            values = {
+                "status": "queued",
+                "last_error": str(error),
+                "locked_at": None,
+                "attempts": PublishJob.attempts - 1,
+                "run_after": datetime.fromtimestamp(error.reset, timezone.utc),
+            }
+            if self._release(db, job_id, token, values):
+                db.commit()
+        finally:
+            db.close()
+
+    def _release(self, db, job_id: int, token: datetime, values: Dict[str, Any]) -> bool:
+        """Apply a job's outcome if this worker still holds its lease."""
+        released = (
+            db.query(PublishJob)
+            .filter(PublishJob.id == job_id, PublishJob.status == "running", PublishJob.locked_at == token)
+            .update(values, synchronize_session=False)
+        )
+        if not released:
+            # Deleted with its confab, or the lease expired and another worker took over
+            logger.warning("Publish job %s lost its lease; discarding this run's outcome", job_id)
+            db.rollback()
+        return bool(released)
+
+
+def _with_traceparent(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Store the current trace context so the publish joins the queuing request's trace
+    span = tracer.current_span()
+    return {**payload, "traceparent": span.traceparent} if span is not None else payload
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# Global instance
+publish_queue = PublishQueue()
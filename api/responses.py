@@ -0,0 +1,23 @@
+from typing import Any
+
+from fastapi.responses import ORJSONResponse, Response
+from pydantic_core import to_json
+
+# Default response class: routes that return plain dicts are encoded by
+# orjson instead of the stdlib json module
+DefaultResponse = ORJSONResponse
+
+
+class ModelResponse(Response):
+    """JSON rendered straight from Pydantic models (or lists of them) by pydantic-core.
+
+    Returning one from a route skips FastAPI's response_model pass, which
+    validates the models again, dumps them to dicts and encodes those with
+    json.dumps. The route's response_model then only documents the schema,
+    so build the models from the same schema class.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
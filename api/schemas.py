@@ -40,7 +40,7 @@ class GitHubRepo(BaseModel):
     full_name: str
     private: bool
     owner: Dict[str, Any]
-    permissions: Dict[str, str]
+    permissions: Dict[str, bool]
 
 class GitHubConnect(BaseModel):
     github_id: int
@@ -245,7 +245,8 @@ class ConfabUpdate(BaseModel):
     description: Optional[str] = None
     config: Optional[Union[ConfabConfig, SimpleConfabConfig]] = None
 
-class ConfabResponse(ConfabBase):
+class ConfabListItem(ConfabBase):
+    """A confab in list and search results (no config or publish job)"""
     id: int
     version: str
     status: str
@@ -256,6 +257,35 @@ class ConfabResponse(ConfabBase):
     class Config:
         from_attributes = True
 
+class ConfabResponse(ConfabListItem):
+    config: Optional[Dict[str, Any]] = None
+    publish_job_id: Optional[int] = None
+
+class ConfabSearchResult(ConfabListItem):
+    rank: float
+
+class ConfabBulkResult(BaseModel):
+    created: int
+    confab_ids: List[int]
+    errors: List[Dict[str, Any]] = Field(default_factory=list, description="Rejected lines with their validation errors")
+    publish_job_id: Optional[int] = None
+
+# Publish job schemas
+class PublishJobResponse(BaseModel):
+    id: int
+    confab_id: int
+    action: str
+    status: str
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    result_url: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # Auth schemas
 class Token(BaseModel):
     access_token: str
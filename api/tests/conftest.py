@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+from dotenv import load_dotenv
+
+# Use DATABASE_URL from the environment or .env, otherwise a throwaway SQLite file
+load_dotenv()
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
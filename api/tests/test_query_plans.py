@@ -0,0 +1,167 @@
+"""The API's hot queries must be served by indexes.
+
+Seeds a throwaway dataset inside a transaction, EXPLAINs the queries the
+routes in main.py issue, and fails if any of them falls back to a full table
+scan (or, for list queries, to an explicit sort). Everything is rolled back
+afterwards, so it is safe to point DATABASE_URL at a development database.
+Supports PostgreSQL and SQLite.
+"""
+import json
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import joinedload
+
+from database import Base, engine
+from models import User, Confab, GitHubAccount, PublishJob
+from main import CONFAB_LIST_COLUMNS, confab_list_query, confab_search_query, _encode_cursor
+
+USERS = 200
+CONFABS_PER_USER = 50
+
+CHECKED_TABLES = {"users", "confabs", "github_accounts", "publish_jobs"}
+
+# (name, statement builder, is_ordered_list) for each query the routes issue
+HOT_QUERIES = [
+    ("GET /confabs", lambda ids: confab_list_query(ids["user_id"], _list_columns(), 101), True),
+    ("GET /confabs?status=", lambda ids: confab_list_query(ids["user_id"], _list_columns(), 101, status_filter="published"), True),
+    ("GET /confabs?cursor=", lambda ids: confab_list_query(ids["user_id"], _list_columns(), 101, cursor=ids["cursor"]), True),
+    ("GET /confabs?name=", lambda ids: confab_list_query(ids["user_id"], _list_columns(), 101, name="bot"), True),
+    ("GET /confabs?match=", lambda ids: confab_list_query(
+        ids["user_id"], _list_columns(), 101, config_matches=["model.provider=anthropic", "capabilities.web_search=true"]
+    ), True),
+    ("GET /confabs/search", lambda ids: confab_search_query(ids["user_id"], _list_columns(), "bot", 101), False),
+    ("GET /confabs/{id}", lambda ids: select(Confab).where(Confab.id == ids["confab_id"], Confab.user_id == ids["user_id"]), False),
+    ("current user", lambda ids: select(User).options(joinedload(User.github_account)).where(User.id == ids["user_id"]), False),
+    ("user by email", lambda ids: select(User).where(User.email == ids["email"]), False),
+    ("GitHub account by user", lambda ids: select(GitHubAccount).where(GitHubAccount.user_id == ids["user_id"]), False),
+    ("GET /jobs/{id}", lambda ids: select(PublishJob).where(PublishJob.id == 1, PublishJob.user_id == ids["user_id"]), False),
+]
+
+
+def _list_columns() -> list:
+    return list(CONFAB_LIST_COLUMNS.values())
+
+
+def seed(conn) -> dict:
+    """Insert users, GitHub accounts and confabs; return ids to query with."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    user_ids = conn.execute(
+        insert(User.__table__).returning(User.__table__.c.id),
+        [
+            {
+                "name": f"Plan Check {i}",
+                "email": f"plan-check-{i}@example.invalid",
+                "password_hash": "x",
+                "country": "US",
+                "timezone": "UTC",
+            }
+            for i in range(USERS)
+        ]
+    ).scalars().all()
+    conn.execute(insert(GitHubAccount.__table__), [
+        {
+            "user_id": user_id,
+            "github_id": user_id,
+            "github_username": f"plan-check-{user_id}",
+            "access_token": "x",
+            "selected_repo": "confabs",
+        }
+        for user_id in user_ids
+    ])
+    statuses = ["draft", "published", "archived"]
+    providers = ["openai", "anthropic", "google", "local"]
+    conn.execute(insert(Confab.__table__), [
+        {
+            "name": f"bot_{user_id}_{n}",
+            "description": "Seeded for query plan checks",
+            "version": "1.0.0",
+            "status": statuses[n % len(statuses)],
+            "config": {
+                "model": {"provider": providers[n % len(providers)], "model_name": "seeded"},
+                "capabilities": {"web_search": n % 2 == 0},
+            },
+            "user_id": user_id,
+            "created_at": start + timedelta(minutes=user_id * CONFABS_PER_USER + n),
+        }
+        for user_id in user_ids
+        for n in range(CONFABS_PER_USER)
+    ])
+
+    user_id = user_ids[len(user_ids) // 2]
+    middle = conn.execute(
+        select(Confab.id, Confab.created_at)
+        .where(Confab.user_id == user_id)
+        .order_by(Confab.created_at.desc(), Confab.id.desc())
+        .offset(CONFABS_PER_USER // 2)
+        .limit(1)
+    ).one()
+    return {
+        "user_id": user_id,
+        "email": f"plan-check-{user_ids.index(user_id)}@example.invalid",
+        "confab_id": middle.id,
+        "cursor": _encode_cursor(middle.created_at, middle.id),
+    }
+
+
+def _literal_sql(conn, statement) -> str:
+    return str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _postgres_problems(conn, statement, ordered: bool) -> list:
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {_literal_sql(conn, statement)}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    problems = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in CHECKED_TABLES:
+            problems.append(f"Seq Scan on {node['Relation Name']}")
+        if ordered and node["Node Type"] in ("Sort", "Incremental Sort"):
+            problems.append(f"{node['Node Type']} on {node.get('Sort Key')}")
+    return problems
+
+
+def _sqlite_problems(conn, statement, ordered: bool) -> list:
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {_literal_sql(conn, statement)}")).all()
+    problems = []
+    for row in rows:
+        detail = row[-1]
+        match = re.match(r"SCAN (\w+)", detail)
+        if match and match.group(1) in CHECKED_TABLES and "USING" not in detail:
+            problems.append(detail)
+        if ordered and "TEMP B-TREE FOR ORDER BY" in detail:
+            problems.append(detail)
+    return problems
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    """A connection holding the seeded dataset, rolled back after the module."""
+    checks = {"postgresql": _postgres_problems, "sqlite": _sqlite_problems}
+    if engine.dialect.name not in checks:
+        pytest.skip(f"Unsupported database: {engine.dialect.name}")
+
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            ids = seed(conn)
+            conn.execute(text("ANALYZE"))
+            yield conn, ids, checks[engine.dialect.name]
+        finally:
+            transaction.rollback()
+
+
+@pytest.mark.parametrize(
+    "build, ordered",
+    [(build, ordered) for _, build, ordered in HOT_QUERIES],
+    ids=[name for name, _, _ in HOT_QUERIES]
+)
+def test_hot_query_uses_index(seeded, build, ordered):
+    conn, ids, problems = seeded
+    assert problems(conn, build(ids), ordered) == []
@@ -0,0 +1,357 @@
+import contextvars
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+import os
+
+import httpx
+from sqlalchemy import event
+
+from metrics import statement_labels
+
+load_dotenv()
+
+# Tracing configuration
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")  # none, file, otlp
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.ndjson")
+TRACING_OTLP_ENDPOINT = os.getenv(
+    "TRACING_OTLP_ENDPOINT", os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+)
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", os.getenv("OTEL_SERVICE_NAME", "confab-api"))
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+TRACING_EXPORT_INTERVAL = float(os.getenv("TRACING_EXPORT_INTERVAL", "5"))
+TRACING_MAX_QUEUE = int(os.getenv("TRACING_MAX_QUEUE", "10000"))
+# Longer SQL is truncated in span attributes
+TRACING_MAX_STATEMENT_LENGTH = int(os.getenv("TRACING_MAX_STATEMENT_LENGTH", "2000"))
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+class Span:
+    """One timed operation in a trace."""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str],
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+        sampled: bool = True
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.sampled = sampled
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, error: str) -> None:
+        self.error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round((self.end_time - self.start_time) / 1e6, 3) if self.end_time else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class FileExporter:
+    """Appends finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPExporter:
+    """Sends finished spans to an OpenTelemetry collector over OTLP/HTTP (JSON)."""
+
+    def __init__(self, endpoint: str, service_name: str):
+        self.url = f"{endpoint.rstrip('/')}/v1/traces"
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=10.0)
+
+    def export(self, spans: List[Span]) -> None:
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "foundry"},
+                    "spans": [
+                        {
+                            "traceId": span.trace_id,
+                            "spanId": span.span_id,
+                            "parentSpanId": span.parent_span_id or "",
+                            "name": span.name,
+                            "kind": SPAN_KINDS[span.kind],
+                            "startTimeUnixNano": str(span.start_time),
+                            "endTimeUnixNano": str(span.end_time),
+                            "attributes": [
+                                {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+                            ],
+                            "status": {"code": 2, "message": span.error} if span.error else {"code": 0},
+                        }
+                        for span in spans
+                    ],
+                }],
+            }]
+        }
+        self._client.post(self.url, json=body).raise_for_status()
+
+
+class Tracer:
+    """Creates spans, tracks the current one per task/thread and exports them in batches.
+
+    Finished spans are queued and written by a background thread every
+    TRACING_EXPORT_INTERVAL seconds, so exporting never blocks a request.
+    When the queue is full new spans are dropped and counted.
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+        self._queue: List[Span] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.exported = 0
+        self.dropped = 0
+        self.export_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_span(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+        traceparent: Optional[str] = None
+    ) -> Optional[Span]:
+        """Start a span under the current one (or the given traceparent); None when not recording."""
+        if not self.enabled:
+            return None
+        parent = self._current.get()
+        if parent is not None:
+            return Span(name, parent.trace_id, parent.span_id, kind, attributes, parent.sampled)
+        match = _TRACEPARENT.match(traceparent or "")
+        if match:
+            return Span(name, match.group(1), match.group(2), kind, attributes, bool(int(match.group(3), 16) & 1))
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        return Span(name, f"{random.getrandbits(128):032x}", None, kind, attributes, sampled)
+
+    def end_span(self, span: Optional[Span]) -> None:
+        if span is None:
+            return
+        span.end_time = time.time_ns()
+        if not span.sampled:
+            return
+        with self._lock:
+            if len(self._queue) >= TRACING_MAX_QUEUE:
+                self.dropped += 1
+                return
+            self._queue.append(span)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+        traceparent: Optional[str] = None
+    ) -> Iterator[Optional[Span]]:
+        """Run a block inside a span that is current for everything it calls."""
+        span = self.start_span(name, kind, attributes, traceparent)
+        if span is None:
+            yield None
+            return
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self._current.reset(token)
+            self.end_span(span)
+
+    def start(self) -> None:
+        """Start the background export thread."""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """Stop the export thread after writing out the queued spans."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout=TRACING_EXPORT_INTERVAL + 10)
+        self._thread = None
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._queue = self._queue, []
+        if not spans:
+            return
+        try:
+            self.exporter.export(spans)
+            self.exported += len(spans)
+        except Exception:
+            self.export_errors += 1
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(TRACING_EXPORT_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+        self.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "exporter": type(self.exporter).__name__ if self.exporter else None,
+            "queued": len(self._queue),
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "export_errors": self.export_errors,
+        }
+
+
+def build_tracer() -> Tracer:
+    if TRACING_EXPORTER == "file":
+        return Tracer(FileExporter(TRACING_FILE), TRACING_SAMPLE_RATE)
+    if TRACING_EXPORTER == "otlp":
+        return Tracer(OTLPExporter(TRACING_OTLP_ENDPOINT, TRACING_SERVICE_NAME), TRACING_SAMPLE_RATE)
+    if TRACING_EXPORTER != "none":
+        raise ValueError(f"Unknown TRACING_EXPORTER: {TRACING_EXPORTER}")
+    return Tracer()
+
+
+# Global instance
+tracer = build_tracer()
+
+
+class TracingMiddleware:
+    """ASGI middleware that wraps every HTTP request in a server span.
+
+    A W3C ``traceparent`` request header continues the caller's trace, and
+    the trace id is returned in ``X-Trace-Id``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1")
+        with tracer.span(scope["method"], "server", {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        }, traceparent) as span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.record_error(f"HTTP {message['status']}")
+                    message.setdefault("headers", [])
+                    message["headers"] = [*message["headers"], (b"x-trace-id", span.trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{scope['method']} {route}"
+                    span.set_attribute("http.route", route)
+
+
+def trace_engine(sync_engine) -> None:
+    """Record a child span for every statement an engine executes."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = None
+        if tracer.current_span() is not None:
+            operation, table = statement_labels(statement)
+            span = tracer.start_span(f"{operation} {table}", "client", {
+                "db.system": conn.dialect.name,
+                "db.operation": operation,
+                "db.sql.table": table,
+                "db.statement": statement[:TRACING_MAX_STATEMENT_LENGTH],
+            })
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = conn.info["trace_spans"].pop()
+        if span is not None:
+            span.set_attribute("db.rowcount", cursor.rowcount if cursor.rowcount >= 0 else None)
+            tracer.end_span(span)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            if span is not None:
+                span.record_error(f"{type(exception_context.original_exception).__name__}: {exception_context.original_exception}")
+                tracer.end_span(span)